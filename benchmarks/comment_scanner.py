@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Times the comment scanner on a generated header made of one huge comment
+and one huge #define, of growing sizes, then checks that peak RSS stays
+flat over repeated calls.
+
+    python3 benchmarks/comment_scanner.py [--sizes 1,2,4,8]
+
+Sizes are in MiB. The scanner of the installed hotdoc_c_extension is
+used, build another revision in place to compare against it.
+"""
+
+import argparse
+import resource
+import time
+
+from hotdoc_c_extension.c_comment_scanner.c_comment_scanner import \
+    extract_comments
+
+LINE_LENGTH = 80
+
+
+def generate_header(size):
+    n_lines = size // LINE_LENGTH
+    comment = '/**\n' + (' * ' + 'x' * 75 + '\n') * n_lines + ' */\n'
+    define = ('#define BIG \\\n' + ('  ' + 'y' * 75 + ' \\\n') * n_lines +
+              '  0\n')
+    return comment + define
+
+
+def get_max_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='1,2,4,8',
+                        help='Comma separated header sizes, in MiB')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='Runs per size, their times are averaged')
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='Extra calls on the largest header to check '
+                        'for leaks')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print('%6s %10s %12s' % ('MiB', 'seconds', 'max RSS kB'))
+    for size in sizes:
+        text = generate_header(size << 20)
+        start = time.time()
+        for _ in range(args.runs):
+            extract_comments(text)
+        print('%6d %10.3f %12d' % (size, (time.time() - start) / args.runs,
+                                   get_max_rss()))
+
+    before = get_max_rss()
+    for _ in range(args.repeat):
+        extract_comments(text)
+    print('max RSS after %d more calls on %d MiB: %d kB (was %d kB)' %
+          (args.repeat, sizes[-1], get_max_rss(), before))
+
+
+if __name__ == '__main__':
+    main()
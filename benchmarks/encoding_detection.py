@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Times decoding a set of sources the way the comment pass used to, running
+cchardet on every line, against detecting the encoding once per file
+with read_source_bytes.
+
+    python3 benchmarks/encoding_detection.py source...
+"""
+
+import argparse
+import time
+
+import cchardet
+
+from hotdoc_c_extension.utils import encoding
+from hotdoc_c_extension.utils.encoding import read_source_bytes
+
+
+def decode_per_line(path):
+    with open(path, 'rb') as _:
+        lines = _.readlines()
+    # cchardet gives up on some lines, which the comment pass didn't
+    # handle
+    return ''.join(line.decode(cchardet.detect(line)['encoding'] or 'utf-8',
+                               errors='replace') for line in lines)
+
+
+def decode_per_file(path):
+    data, encoding_ = read_source_bytes(path)
+    return data.decode(encoding_, errors='replace')
+
+
+def best_time(function, paths, runs, setup=None):
+    best = None
+    for _ in range(runs):
+        if setup:
+            setup()
+        start = time.time()
+        for path in paths:
+            function(path)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('sources', nargs='+')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Runs per method, the fastest one is kept')
+    args = parser.parse_args()
+
+    n_bytes = 0
+    for path in args.sources:
+        with open(path, 'rb') as _:
+            n_bytes += len(_.read())
+    print('%d files, %d kB' % (len(args.sources), n_bytes // 1024))
+
+    print('per line:          %.3fs' % best_time(decode_per_line,
+                                                 args.sources, args.runs))
+    print('per file:          %.3fs' % best_time(
+        decode_per_file, args.sources, args.runs,
+        setup=encoding._ENCODINGS.clear))
+    print('per file, cached:  %.3fs' % best_time(decode_per_file,
+                                                 args.sources, args.runs))
+
+
+if __name__ == '__main__':
+    main()
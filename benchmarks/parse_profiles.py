@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Times the extraction of the symbols of a set of headers with each parse
+profile (see --c-parse-profile). Every run happens in a fresh process,
+so that peak RSS and libclang's caches are comparable between them.
+
+    python3 benchmarks/parse_profiles.py [--cflags CFLAGS] header...
+
+The headers are scanned the way CExtension.setup scans them, without
+the comment pass.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shlex
+import subprocess
+import sys
+import time
+
+
+def run_profile(args):
+    from hotdoc_c_extension.clang import cindex
+    from hotdoc_c_extension.c_extension import ClangScanner
+    from hotdoc_c_extension.symbol_records import SymbolRecorder
+
+    if args.libclang:
+        cindex.Config.set_library_file(args.libclang)
+        cindex.Config.set_compatibility_check(False)
+
+    # Workers scan with the same stand-ins for the app and the database
+    scanner = ClangScanner(None, None, SymbolRecorder())
+    filenames = [os.path.abspath(f) for f in args.headers]
+    start = time.time()
+    scanner.scan(filenames, shlex.split(args.cflags), False, True, ['*.h'],
+                 all_sources=filenames, parse_profile=args.run_profile)
+    elapsed = time.time() - start
+
+    json.dump({'seconds': elapsed, 'n_symbols': len(scanner.symbols),
+               'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss},
+              sys.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('headers', nargs='+')
+    parser.add_argument('--cflags', default='',
+                        help='Flags to parse the headers with')
+    parser.add_argument('--profiles', default='default,fast',
+                        help='Comma separated parse profiles to compare')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='Runs per profile, the fastest one is kept')
+    parser.add_argument('--libclang',
+                        help='libclang to load instead of the one '
+                        'llvm-config points to')
+    parser.add_argument('--run-profile', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_profile:
+        run_profile(args)
+        return
+
+    print('%d headers' % len(args.headers))
+    print('%-10s %10s %10s %12s' % ('profile', 'seconds', 'symbols',
+                                    'max RSS kB'))
+    for profile in args.profiles.split(','):
+        results = []
+        for _ in range(args.runs):
+            command = [sys.executable, os.path.abspath(__file__),
+                       '--run-profile', profile, '--cflags', args.cflags]
+            if args.libclang:
+                command += ['--libclang', args.libclang]
+            output = subprocess.check_output(command + args.headers)
+            results.append(json.loads(output.decode()))
+        best = min(results, key=lambda result: result['seconds'])
+        print('%-10s %10.3f %10d %12d' % (profile, best['seconds'],
+                                          best['n_symbols'],
+                                          best['max_rss']))
+
+
+if __name__ == '__main__':
+    main()
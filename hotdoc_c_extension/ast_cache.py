@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+On-disk caches of parsed translation units and precompiled headers.
+
+Each translation unit is saved with TranslationUnit.save after it was
+parsed, along with a manifest of the files it was built from and their
+content hashes. The cache entry is looked up by the main file and the
+exact arguments and parse options it was built with, and only loaded if
+every file listed in the manifest still hashes the same.
+"""
+
+import os
+import json
+import time
+
+from hotdoc_c_extension.clang import cindex
+from hotdoc_c_extension.utils.hashing import hash_file, hash_strings
+
+
+# Precompiled headers built with other arguments are only removed once
+# they have not been used for that long, as the cache directory may be
+# shared between projects and concurrent builds
+PCH_MAX_AGE = 7 * 24 * 3600
+
+
+def _ensure_dir(path):
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r') as _:
+            return json.load(_)
+    except (IOError, ValueError):
+        return None
+
+
+def _dependencies_unchanged(dependencies):
+    for path, digest in dependencies.items():
+        if hash_file(path) != digest:
+            return False
+    return True
+
+
+def _hash_dependencies(filename, tu):
+    """
+    Returns a map of the files `tu` was built from to their hashes, or
+    None if one of them could not be read.
+    """
+    dependencies = {filename: hash_file(filename)}
+    for include in tu.get_includes():
+        path = os.path.abspath(str(include.include))
+        dependencies[path] = hash_file(path)
+
+    if None in dependencies.values():
+        return None
+
+    return dependencies
+
+
+def _save_tu(tu, path):
+    # Workers may be saving concurrently
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        tu.save(tmp_path)
+    except cindex.TranslationUnitSaveError:
+        return False
+    os.rename(tmp_path, path)
+    return True
+
+
+def _write_manifest(manifest, path):
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'w') as _:
+        json.dump(manifest, _)
+    os.rename(tmp_path, path)
+
+
+def _touch(path):
+    # Marks a cache entry as used, for pruning
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+class ASTCache(object):
+    def __init__(self, cache_dir):
+        self.__cache_dir = cache_dir
+        _ensure_dir(cache_dir)
+
+    def __paths(self, filename, args, options):
+        key = hash_strings(filename, str(options), *args)
+        base = os.path.join(self.__cache_dir, key)
+        return base + '.ast', base + '.json'
+
+    def load(self, index, filename, args, options):
+        """
+        Returns the cached TranslationUnit for `filename` parsed with
+        `args` and `options`, or None if there is no up to date entry.
+        """
+        ast_path, manifest_path = self.__paths(filename, args, options)
+
+        manifest = _load_manifest(manifest_path)
+        if manifest is None or not _dependencies_unchanged(manifest):
+            return None
+
+        try:
+            return cindex.TranslationUnit.from_ast_file(ast_path, index)
+        except cindex.TranslationUnitLoadError:
+            return None
+
+    def save(self, filename, args, options, tu):
+        ast_path, manifest_path = self.__paths(filename, args, options)
+
+        manifest = _hash_dependencies(filename, tu)
+        if manifest is None:
+            return
+
+        if _save_tu(tu, ast_path):
+            _write_manifest(manifest, manifest_path)
+
+
+class PCHCache(object):
+    """
+    Builds one precompiled header for a list of headers, per set of
+    arguments, and rebuilds it when one of the files it was built from
+    changes.
+    """
+    def __init__(self, cache_dir):
+        self.__cache_dir = cache_dir
+        _ensure_dir(cache_dir)
+
+    def get(self, index, headers, args, options):
+        """
+        Returns the path to an up to date precompiled header including
+        `headers`, or None if it could not be built.
+        """
+        key = hash_strings(str(options), *(headers + ['--'] + args))
+        base = os.path.join(self.__cache_dir, 'pch-%s' % key)
+        umbrella_path = base + '.h'
+        manifest_path = base + '.json'
+
+        manifest = _load_manifest(manifest_path)
+        if manifest is not None:
+            pch_path = os.path.join(self.__cache_dir, manifest['pch'])
+            if os.path.exists(pch_path) and \
+                    _dependencies_unchanged(manifest['dependencies']):
+                for path in (umbrella_path, manifest_path, pch_path):
+                    _touch(path)
+                return pch_path
+            if os.path.exists(pch_path):
+                os.unlink(pch_path)
+
+        with open(umbrella_path, 'w') as _:
+            for header in headers:
+                _.write('#include "%s"\n' % header)
+
+        tu = index.parse(umbrella_path, args=args + ['-x', 'c-header'],
+                         options=options)
+        dependencies = _hash_dependencies(umbrella_path, tu)
+        if dependencies is None:
+            return None
+
+        # The name changes with the contents, so that translation units
+        # cached with a previous version of the header are not reused
+        pch_name = 'pch-%s-%s.pch' % (
+            key, hash_strings(*sorted(dependencies.values())))
+        pch_path = os.path.join(self.__cache_dir, pch_name)
+        if not _save_tu(tu, pch_path):
+            return None
+
+        _write_manifest({'pch': pch_name, 'dependencies': dependencies},
+                        manifest_path)
+        self.__prune(key, pch_name)
+        return pch_path
+
+    def __prune(self, key, pch_name):
+        # Older versions of this precompiled header are replaced by the
+        # new one, those of other arguments are left to expire
+        current = ('pch-%s.h' % key, 'pch-%s.json' % key, pch_name)
+        replaced = 'pch-%s-' % key
+        expired = time.time() - PCH_MAX_AGE
+        for name in os.listdir(self.__cache_dir):
+            if not name.startswith('pch-') or name in current or \
+                    name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.__cache_dir, name)
+            try:
+                if name.startswith(replaced) or \
+                        os.path.getmtime(path) < expired:
+                    os.unlink(path)
+            except OSError:
+                pass
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Lazy access to the results of extract_comments_table.
+"""
+
+from .c_comment_scanner import extract_comments_table
+
+
+class CommentTable(object):
+    """
+    The comments and macro definitions of a buffer, stored as one text
+    buffer and integer columns rather than a tuple per item.
+
+    Iterating yields (text, lineno, endlineno, indent, is_comment)
+    tuples, the text of an item is only decoded when it's reached.
+    """
+    def __init__(self, buf, encoding='utf-8'):
+        (self.text, self.text_offsets, self.starts, self.ends,
+         self.linenos, self.endlinenos, self.columns, self.indents,
+         self.is_comment) = extract_comments_table(buf)
+        self.encoding = encoding
+
+    def __len__(self):
+        return len(self.is_comment)
+
+    def get_text(self, i):
+        return self.text[self.text_offsets[i]:
+                         self.text_offsets[i + 1]].decode(self.encoding,
+                                                          errors='replace')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield (self.get_text(i), self.linenos[i], self.endlinenos[i],
+                   self.indents[i], self.is_comment[i])
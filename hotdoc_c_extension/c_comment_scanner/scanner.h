@@ -30,8 +30,71 @@
   #undef _XOPEN_SOURCE
 #endif
 
+#define PY_SSIZE_T_CLEAN
 #include <Python.h>
 
-int scan_comments (const char *contents, PyObject *comments);
+typedef struct
+{
+  /* Where the text of the item is in CommentList.text */
+  size_t text_offset;
+  size_t text_len;
+  /* Byte offsets of the item in the input, end excluded */
+  size_t start;
+  size_t end;
+  int lineno;
+  int endlineno;
+  /* Byte offset of start in its line */
+  int column;
+  /* Leading spaces of the line at lineno, comments only */
+  int indent;
+  int is_comment;
+} CommentItem;
+
+typedef struct
+{
+  CommentItem *items;
+  size_t n_items;
+  size_t n_allocated;
+
+  /* Text of all the items, not nul-terminated */
+  char *text;
+  size_t text_len;
+  size_t text_allocated;
+
+  /* Scanner state */
+  const char *contents;
+  size_t len;
+  size_t offset;
+  size_t line_start;
+  size_t prev_line_start;
+  int eof;
+  int error;
+
+  /* Function tags state, see scan_function_tags */
+  int tags;
+  int brace_depth;
+  int paren_depth;
+  int decl_lineno;
+  size_t ident_start;
+  size_t ident_len;
+  size_t name_start;
+  size_t name_len;
+  int last_token;
+  int in_attribute;
+  int in_function;
+} CommentList;
+
+enum
+{
+  TAG_TOKEN_NONE,
+  TAG_TOKEN_IDENTIFIER,
+  TAG_TOKEN_CLOSE_PAREN,
+  TAG_TOKEN_LINKAGE,
+  TAG_TOKEN_OTHER
+};
+
+int scan_comments (const char *contents, size_t len, CommentList *comments);
+int scan_function_tags (const char *contents, size_t len, CommentList *tags);
+void comment_list_clear (CommentList *comments);
 
 #endif
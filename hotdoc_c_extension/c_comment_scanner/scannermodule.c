@@ -32,27 +32,304 @@ struct module_state {
 static struct module_state _state;
 #endif
 
+static PyObject *
+comment_list_to_python (CommentList *comments)
+{
+  PyObject *list = PyList_New (0);
+  size_t i;
+
+  if (list == NULL)
+    return NULL;
+
+  for (i = 0; i < comments->n_items; i++) {
+    CommentItem *item = &comments->items[i];
+    PyObject *tuple = Py_BuildValue ("(s#iii)",
+        comments->text + item->text_offset,
+        (Py_ssize_t) item->text_len,
+        item->lineno,
+        item->endlineno,
+        item->is_comment);
+
+    if (tuple == NULL || PyList_Append (list, tuple) < 0) {
+      Py_XDECREF (tuple);
+      Py_DECREF (list);
+      return NULL;
+    }
+    Py_DECREF (tuple);
+  }
+
+  return list;
+}
+
 static PyObject *
 scanner_extract_comments (PyObject *self, PyObject *args)
 {
   PyObject *input;
-  char *utf8;
+  const char *utf8;
+  Py_ssize_t len;
   PyObject *list;
+  CommentList comments;
+  int res;
+
+  memset (&comments, 0, sizeof (CommentList));
 
   if (!PyArg_ParseTuple(args, "O!", &PyUnicode_Type, &input))
     return NULL;
 
-  utf8 = PyUnicode_AsUTF8(input);
+  utf8 = PyUnicode_AsUTF8AndSize(input, &len);
+  if (utf8 == NULL)
+    return NULL;
+
+  /* input keeps utf8 alive, the scan itself only touches C data */
+  Py_BEGIN_ALLOW_THREADS
+  res = scan_comments (utf8, len, &comments);
+  Py_END_ALLOW_THREADS
+
+  if (res < 0) {
+    comment_list_clear (&comments);
+    return PyErr_NoMemory ();
+  }
+
+  list = comment_list_to_python (&comments);
+  comment_list_clear (&comments);
+
+  return list;
+}
+
+#if PY_MAJOR_VERSION >= 3
+#define BUFFER_FORMAT "y*"
+#else
+#define BUFFER_FORMAT "s*"
+#endif
+
+enum
+{
+  COLUMN_TEXT_OFFSET,
+  COLUMN_START,
+  COLUMN_END,
+  COLUMN_LINENO,
+  COLUMN_ENDLINENO,
+  COLUMN_COLUMN,
+  COLUMN_INDENT,
+  COLUMN_IS_COMMENT,
+  N_COLUMNS
+};
+
+static PyObject *
+int_array_from_values (const int *values, size_t n_values)
+{
+  PyObject *array_module;
+  PyObject *bytes;
+  PyObject *array;
+
+  array_module = PyImport_ImportModule ("array");
+  if (array_module == NULL)
+    return NULL;
+
+  bytes = PyBytes_FromStringAndSize ((const char *) values,
+      n_values * sizeof (int));
+  if (bytes == NULL) {
+    Py_DECREF (array_module);
+    return NULL;
+  }
+
+  array = PyObject_CallMethod (array_module, "array", "sO", "i", bytes);
+  Py_DECREF (bytes);
+  Py_DECREF (array_module);
+  return array;
+}
+
+static PyObject *
+comment_list_to_table (CommentList *comments)
+{
+  int *columns[N_COLUMNS];
+  PyObject *result = NULL;
+  size_t n = comments->n_items;
+  size_t i;
+  int j;
+
+  /* The text offsets column has an extra item, the end of the text */
+  for (j = 0; j < N_COLUMNS; j++)
+    columns[j] = malloc ((n + 1) * sizeof (int));
+
+  for (j = 0; j < N_COLUMNS; j++) {
+    if (columns[j] == NULL) {
+      PyErr_NoMemory ();
+      goto out;
+    }
+  }
+
+  for (i = 0; i < n; i++) {
+    CommentItem *item = &comments->items[i];
+
+    columns[COLUMN_TEXT_OFFSET][i] = item->text_offset;
+    columns[COLUMN_START][i] = item->start;
+    columns[COLUMN_END][i] = item->end;
+    columns[COLUMN_LINENO][i] = item->lineno;
+    columns[COLUMN_ENDLINENO][i] = item->endlineno;
+    columns[COLUMN_COLUMN][i] = item->column;
+    columns[COLUMN_INDENT][i] = item->indent;
+    columns[COLUMN_IS_COMMENT][i] = item->is_comment;
+  }
+  columns[COLUMN_TEXT_OFFSET][n] = comments->text_len;
+
+  result = PyTuple_New (N_COLUMNS + 1);
+  if (result == NULL)
+    goto out;
+
+  PyTuple_SET_ITEM (result, 0, PyBytes_FromStringAndSize (
+        comments->text ? comments->text : "", comments->text_len));
+  for (j = 0; j < N_COLUMNS; j++)
+    PyTuple_SET_ITEM (result, j + 1, int_array_from_values (columns[j],
+          j == COLUMN_TEXT_OFFSET ? n + 1 : n));
+
+  for (j = 0; j <= N_COLUMNS; j++) {
+    if (PyTuple_GET_ITEM (result, j) == NULL) {
+      Py_CLEAR (result);
+      break;
+    }
+  }
+
+out:
+  for (j = 0; j < N_COLUMNS; j++)
+    free (columns[j]);
+
+  return result;
+}
+
+/* Scans the bytes-like object passed in args, returns -1 with an
+ * exception set on error */
+static int
+scan_buffer_arg (PyObject *args, CommentList *comments)
+{
+  Py_buffer view;
+  int res;
+
+  memset (comments, 0, sizeof (CommentList));
+
+  if (!PyArg_ParseTuple(args, BUFFER_FORMAT, &view))
+    return -1;
+
+  /* The buffer stays exported, and thus valid, until released */
+  Py_BEGIN_ALLOW_THREADS
+  res = scan_comments (view.buf, view.len, comments);
+  Py_END_ALLOW_THREADS
+
+  PyBuffer_Release (&view);
+
+  if (res < 0) {
+    comment_list_clear (comments);
+    PyErr_NoMemory ();
+    return -1;
+  }
+
+  return 0;
+}
+
+static PyObject *
+scanner_extract_comments_from_buffer (PyObject *self, PyObject *args)
+{
+  PyObject *list;
+  CommentList comments;
+  size_t i;
+
+  if (scan_buffer_arg (args, &comments) < 0)
+    return NULL;
+
+  list = PyList_New (0);
+  for (i = 0; list != NULL && i < comments.n_items; i++) {
+    CommentItem *item = &comments.items[i];
+    PyObject *tuple = Py_BuildValue ("(nniiiii)",
+        (Py_ssize_t) item->start,
+        (Py_ssize_t) item->end,
+        item->lineno,
+        item->endlineno,
+        item->column,
+        item->indent,
+        item->is_comment);
+
+    if (tuple == NULL || PyList_Append (list, tuple) < 0)
+      Py_CLEAR (list);
+    Py_XDECREF (tuple);
+  }
+
+  comment_list_clear (&comments);
+
+  return list;
+}
+
+static PyObject *
+scanner_extract_comments_table (PyObject *self, PyObject *args)
+{
+  PyObject *table;
+  CommentList comments;
+
+  if (scan_buffer_arg (args, &comments) < 0)
+    return NULL;
+
+  table = comment_list_to_table (&comments);
+  comment_list_clear (&comments);
+
+  return table;
+}
+
+static PyObject *
+scanner_extract_function_tags (PyObject *self, PyObject *args)
+{
+  Py_buffer view;
+  PyObject *list;
+  CommentList tags;
+  size_t i;
+  int res;
+
+  memset (&tags, 0, sizeof (CommentList));
+
+  if (!PyArg_ParseTuple(args, BUFFER_FORMAT, &view))
+    return NULL;
+
+  Py_BEGIN_ALLOW_THREADS
+  res = scan_function_tags (view.buf, view.len, &tags);
+  Py_END_ALLOW_THREADS
+
+  PyBuffer_Release (&view);
+
+  if (res < 0) {
+    comment_list_clear (&tags);
+    return PyErr_NoMemory ();
+  }
 
   list = PyList_New (0);
-  scan_comments (utf8, list);
+  for (i = 0; list != NULL && i < tags.n_items; i++) {
+    CommentItem *item = &tags.items[i];
+    PyObject *tuple = Py_BuildValue ("(s#ii)",
+        tags.text + item->text_offset,
+        (Py_ssize_t) item->text_len,
+        item->lineno,
+        item->endlineno);
+
+    if (tuple == NULL || PyList_Append (list, tuple) < 0)
+      Py_CLEAR (list);
+    Py_XDECREF (tuple);
+  }
+
+  comment_list_clear (&tags);
 
-  Py_INCREF (list);
   return list;
 }
 
 static PyMethodDef scanner_methods[] = {
   {"extract_comments",  scanner_extract_comments, METH_VARARGS, "Extract comments from string."},
+  {"extract_comments_from_buffer",  scanner_extract_comments_from_buffer, METH_VARARGS,
+    "Extract comments from a bytes-like object, as (start, end, lineno, "
+    "endlineno, column, indent, is_comment) tuples, start and end being "
+    "byte offsets."},
+  {"extract_comments_table",  scanner_extract_comments_table, METH_VARARGS,
+    "Extract comments from a bytes-like object, as a (text, text_offsets, "
+    "starts, ends, linenos, endlinenos, columns, indents, is_comment) "
+    "tuple of a bytes object and array('i') columns. See CommentTable."},
+  {"extract_function_tags",  scanner_extract_function_tags, METH_VARARGS,
+    "List the function definitions at the top level of a bytes-like "
+    "object, as (name, start_line, end_line) tuples."},
   {NULL, NULL, 0, NULL}
 };
 
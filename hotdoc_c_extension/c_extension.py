@@ -16,9 +16,10 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
-import os, sys, linecache, pkgconfig, glob, subprocess
+import os, sys, glob, multiprocessing, time, resource
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
 
-import cchardet
 
 from hotdoc_c_extension.clang import cindex
 from ctypes import *
@@ -36,7 +37,24 @@ from hotdoc.parsers.gtk_doc import GtkDocParser
 from hotdoc.utils.loggable import (info as core_info, warn, Logger,
     debug as core_debug)
 
-from .c_comment_scanner.c_comment_scanner import extract_comments
+from .c_comment_scanner.comment_table import CommentTable
+
+try:
+    from .clang_walker import clang_walker
+except ImportError:
+    clang_walker = None
+from .symbol_records import SymbolRecorder, replay_unit
+from .ast_cache import ASTCache, PCHCache
+from .comment_cache import CommentCache
+from .fingerprints import FingerprintStore
+from .function_tags import FunctionTagIndex
+from .inclusion_cache import InclusionCache
+from .compile_commands import CompileFlags
+from .include_graph import (IncludeGraph, include_dirs_from_args,
+                            plan_translation_units)
+from .toolchain import get_llvm_info, get_pkg_config_cflags
+from .source_buffers import SourceBuffers
+from .utils.encoding import read_scannable_source
 
 def ast_node_is_function_pointer (ast_node):
     if ast_node.kind == cindex.TypeKind.POINTER and \
@@ -54,10 +72,6 @@ def debug(message):
     core_debug(message, domain='c-extension')
 
 
-def unicode_dammit(data):
-    encoding = cchardet.detect(data)['encoding']
-    return data.decode(encoding, errors='replace')
-
 Logger.register_warning_code('clang-diagnostic', ParsingException,
                              'c-extension')
 Logger.register_warning_code('clang-heisenbug', ParsingException,
@@ -76,21 +90,215 @@ CLANG_HEADERS_WARNING = (
 
 
 def get_clang_headers():
-    version = subprocess.check_output(['llvm-config', '--version']).strip().decode()
-    prefix = subprocess.check_output(['llvm-config', '--prefix']).strip().decode()
-
-    for lib in ['lib', 'lib64']:
-        p = os.path.join(prefix, lib, 'clang', version, 'include')
-        if os.path.exists(p):
-            return p
+    headers = get_llvm_info()['resource_include_dir']
+    if headers is not None:
+        return headers
 
     warn('clang-headers-not-found', CLANG_HEADERS_WARNING)
 
 def get_clang_libdir():
-    return subprocess.check_output(['llvm-config', '--libdir']).strip().decode()
+    return get_llvm_info()['libdir']
+
+
+# Number of translation units looked at to pick the headers to precompile
+PCH_SAMPLE_SIZE = 4
+
+# Not exposed by our cindex, makes the first parse build the preamble
+# instead of the first reparse
+PARSE_CREATE_PREAMBLE_ON_FIRST_PARSE = 0x100
+# Not exposed by our cindex either, libclang >= 5 only
+PARSE_KEEP_GOING = 0x200
+
+# Comment spelling, whitespace removed -> whether the fields that follow
+# are public
+FIELD_DELIMITERS = {
+    '/*<public>*/': True,
+    '/*<private>*/': False,
+    '/*<protected>*/': False,
+}
+
+# Extra parse options for headers. Function bodies are skipped with
+# "fast", as only declarations are documented. libclang's single file
+# parse option is not used, it leaves types from other headers unresolved
+PARSE_PROFILES = ('default', 'fast')
+
+
+# Scanner used by each worker process when parsing with --c-jobs
+_WORKER_SCANNER = None
+
+
+def _init_tu_worker(filenames, args, flags, full_scan, all_sources,
+                    ast_cache_dir, file_args, header_flags):
+    global _WORKER_SCANNER
+    _WORKER_SCANNER = ClangScanner(None, None, SymbolRecorder())
+    _WORKER_SCANNER.init_worker(filenames, args, flags, full_scan,
+                                all_sources, ast_cache_dir, file_args,
+                                header_flags)
+
+
+# Whether clang_walker can be used, decided on first use
+_NATIVE_WALKER = []
+
+
+def get_native_walker():
+    """
+    Returns the clang_walker module if it was built and linked to the
+    libclang the bindings loaded, None otherwise.
+    """
+    if not _NATIVE_WALKER:
+        walker = clang_walker
+        if walker is not None:
+            # The translation units it is handed come from the bindings
+            ours = cast(cindex.conf.lib.clang_getClangVersion,
+                        c_void_p).value
+            if walker.libclang_address() != ours:
+                debug('clang_walker is linked to another libclang than %s, '
+                      'not using it' % cindex.conf.get_filename())
+                walker = None
+        _NATIVE_WALKER.append(walker)
+    return _NATIVE_WALKER[0]
+
+
+def get_header_parse_flags(profile):
+    if profile != 'fast':
+        return 0
+
+    flags = cindex.TranslationUnit.PARSE_SKIP_FUNCTION_BODIES
+    try:
+        if int(get_llvm_info()['version'].split('.')[0]) >= 5:
+            flags |= PARSE_KEEP_GOING
+    except ValueError:
+        pass
+
+    return flags
+
+
+def _scan_tu_worker(filename):
+    return _WORKER_SCANNER.scan_tu_to_records(filename)
+
+
+@contextmanager
+def _recording_warnings(warnings):
+    """
+    Appends the warnings emitted in the block to `warnings`, as
+    (code, message, kwargs) tuples, instead of logging them.
+    """
+    def record_warning(code, message, **kwargs):
+        warnings.append((code, message, kwargs))
+
+    original_warn = Logger.warn
+    Logger.warn = staticmethod(record_warning)
+    try:
+        yield
+    finally:
+        Logger.warn = staticmethod(original_warn)
+
+
+def _parse_comment(comment_parser, comment, filename, lineno, endlineno,
+                   include_paths):
+    """
+    Returns the block parsed out of `comment`, and the warnings emitted
+    while parsing it, which cached blocks emit again.
+    """
+    warnings = []
+    with _recording_warnings(warnings):
+        block = comment_parser.parse_comment(comment, filename, lineno,
+                                             endlineno, include_paths)
+    for code, message, kwargs in warnings:
+        Logger.warn(code, message, **kwargs)
+    return block, warnings
+
+
+def extract_file_comments(comment_parser, filename, include_paths,
+                          comment_cache=None):
+    """
+    Returns the comments and macro definitions of `filename` in source
+    order, as ('comment', block) and ('define', raw) tuples; raw being
+    (text, lineno, endlineno, 0) for the definition.
+
+    Comments found in `comment_cache` aren't parsed again.
+    """
+    items = []
+    cached = {}
+    entries = {}
+    if comment_cache is not None:
+        cached = comment_cache.load(filename, include_paths)
+
+    data, encoding = read_scannable_source(filename)
+
+    for text, lineno, endlineno, indent, is_comment in CommentTable(
+            data, encoding):
+        if is_comment:
+            comment = ' ' * indent + text
+            key = CommentCache.hash_comment(comment)
+            unpacked = None
+            if key in cached:
+                unpacked = CommentCache.unpack(cached[key], lineno)
+
+            if unpacked is not None:
+                block, warnings = unpacked
+                for code, message, kwargs in warnings:
+                    Logger.warn(code, message, **kwargs)
+                entries[key] = cached[key]
+            else:
+                block, warnings = _parse_comment(comment_parser, comment,
+                                                 filename, lineno, endlineno,
+                                                 include_paths)
+                if comment_cache is not None:
+                    entries[key] = CommentCache.pack(block, lineno, warnings)
+
+            if block is not None:
+                items.append(('comment', block))
+        else:
+            items.append(('define', (text, lineno, endlineno, 0)))
+
+    if comment_cache is not None and entries != cached:
+        comment_cache.save(filename, include_paths, entries)
+
+    return items
+
+
+# Set in the parent before forking the comment extraction workers, the
+# comment parser holds the project and isn't meant to be pickled
+_COMMENT_PARSER = None
+_COMMENT_INCLUDE_PATHS = None
+_COMMENT_CACHE = None
+
+
+def _extract_comments_worker(filename):
+    # The journal of a worker is lost, its warnings are handed back to
+    # be emitted by the parent
+    warnings = []
+    with _recording_warnings(warnings):
+        items = extract_file_comments(_COMMENT_PARSER, filename,
+                                      _COMMENT_INCLUDE_PATHS, _COMMENT_CACHE)
+
+    return filename, items, warnings
+
+
+class ScannerSession(object):
+    """
+    State the scanners of a CExtension share for the whole build: the
+    clang index, the comment parser, the mapped source files and the
+    sources already scanned for code inclusions.
+    """
+    def __init__(self, project):
+        self.__index = None
+        self.comment_parser = None
+        if project is not None:
+            self.comment_parser = GtkDocParser(project)
+        self.included_sources = set()
+        self.source_buffers = SourceBuffers()
+
+    @property
+    def index(self):
+        if self.__index is None:
+            self.__index = cindex.Index.create()
+        return self.__index
+
 
 class ClangScanner(object):
-    def __init__(self, app, project, doc_db):
+    def __init__(self, app, project, doc_db, session=None):
         if not cindex.Config.loaded:
             # Let's try and find clang ourselves first
             clang_libdir = get_clang_libdir()
@@ -99,87 +307,547 @@ class ClangScanner(object):
             cindex.Config.set_compatibility_check(False)
 
         self.app = app
-        self.__raw_comment_parser = GtkDocParser(project)
+        if session is None:
+            session = ScannerSession(project)
+        self.__session = session
+        self.__raw_comment_parser = session.comment_parser
+        self.__sources = session.source_buffers
         self.project = project
         self.__doc_db = doc_db
         self.__all_sources = []
+        # Set when running in a worker process, see init_worker
+        self.__recorder = None
+        self.__recorded_files = []
+        self.__ast_cache = None
+        self.__comment_cache = None
+        # filename -> arguments from the compilation database
+        self.__file_args = {}
+        # Textual includes, libclang only reports the first inclusion of
+        # a guarded header
+        self.__include_graph = None
+        # Added to the parse options of headers, see PARSE_PROFILES
+        self.__header_flags = 0
+        self.__keep_tus = False
+        # filename -> translation unit its symbols were extracted from,
+        # only filled when scanning with keep_tus
+        self.__kept_tus = {}
+        self.__file_symbols = {}
+        self.__current_file = None
+        self.__header_guarded = set()
+        # filename -> ([lines], [is_public]) of its field delimiters
+        self.__delimiters = {}
+        self.dependencies = {}
+        # filename -> names no longer defined there after update()
+        self.removed_symbols = {}
+        # Files whose symbols and comments were all extracted since the
+        # last scan or update
+        self.scanned_files = set()
+        self.__reset_type_names()
 
     def scan(self, filenames, options, incremental, full_scan,
-             full_scan_patterns, fail_fast=False, all_sources=None):
+             full_scan_patterns, fail_fast=False, all_sources=None, jobs=1,
+             ast_cache_dir=None, precompiled_headers=None, pch_dir=None,
+             keep_tus=False, compilation_database=None,
+             parse_profile='default', comment_cache_dir=None, merge=False):
+        """
+        With `merge`, the symbols and translation units of `filenames`
+        are added to those kept from a previous scan with keep_tus
+        instead of replacing them, for the files update() could not
+        reparse.
+        """
         if all_sources is None:
             self.__all_sources = []
         else:
             self.__all_sources = all_sources
 
-        index = cindex.Index.create()
+        if ast_cache_dir:
+            self.__ast_cache = ASTCache(ast_cache_dir)
+        else:
+            self.__ast_cache = None
+
+        if comment_cache_dir:
+            self.__comment_cache = CommentCache(comment_cache_dir)
+        else:
+            self.__comment_cache = None
+
         flags = cindex.TranslationUnit.PARSE_INCOMPLETE | cindex.TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD
+        self.__header_flags = get_header_parse_flags(parse_profile)
+
+        merge = merge and keep_tus and self.__keep_tus
+        self.__keep_tus = keep_tus
+        if not merge:
+            self.__kept_tus = {}
+            self.__file_symbols = {}
+            self.scanned_files = set()
+        self.__reset_type_names()
+        if keep_tus:
+            # Translation units loaded from AST files can't be reparsed
+            self.__ast_cache = None
+            jobs = 1
+            flags |= cindex.TranslationUnit.PARSE_PRECOMPILED_PREAMBLE
+            flags |= PARSE_CREATE_PREAMBLE_ON_FIRST_PARSE
 
         info('scanning %d C source files' % len(filenames))
-        self.filenames = filenames
 
         # FIXME: er maybe don't do that ?
-        args = ["-Wno-attributes"]
-        args.append ("-isystem%s" % get_clang_headers())
-        args.extend (options)
-        self.symbols = {}
-        self.parsed = set({})
+        base_args = ["-Wno-attributes"]
+        base_args.append ("-isystem%s" % get_clang_headers())
+        args = base_args + options
+
+        if merge:
+            known = set(self.filenames)
+            self.filenames = list(self.filenames) + [
+                f for f in filenames if f not in known]
+            for filename in filenames:
+                self.parsed.discard(filename)
+                self.dependencies.pop(filename, None)
+            header_guarded = self.__header_guarded
+            header_guarded.difference_update(filenames)
+        else:
+            self.filenames = filenames
+            self.symbols = {}
+            self.parsed = set({})
+            # filename -> project headers it (transitively) includes
+            self.dependencies = {}
+            header_guarded = set()
+            self.__header_guarded = header_guarded
 
         debug('CFLAGS %s' % ' '.join(args))
 
-        header_guarded = set()
-
-        for filename in self.filenames:
-            if filename in self.parsed:
-                continue
+        to_parse = [filename for filename in filenames
+                    if any(fnmatch(filename, p) for p in full_scan_patterns)]
+
+        self.__file_args = self.__get_file_args(compilation_database,
+                                                to_parse, base_args)
+        self.__include_graph = IncludeGraph(self.__get_include_dirs(args))
+
+        # Parse first the files that will also cover others through their
+        # includes, the rest will mostly be skipped as already parsed
+        planned, unplanned = self.__plan_tus(to_parse, args)
+        to_parse = planned + unplanned
+
+        index = self.__session.index
+
+        # Translation units parsed while looking for headers to precompile
+        sampled = {}
+        if precompiled_headers is not None and to_parse:
+            args = self.__add_pch_args(index, to_parse, args, flags,
+                                       precompiled_headers, pch_dir, sampled)
+
+        start_time = time.time()
+
+        if jobs > 1 and len(to_parse) > 1:
+            # The sampled translation units come first in to_parse
+            n_sampled = len(sampled)
+            for filename in to_parse[:n_sampled]:
+                self.__scan_parsed_tu(filename, sampled.pop(filename),
+                                      full_scan, header_guarded)
+            self.__scan_tus_parallel(
+                planned[n_sampled:],
+                unplanned[max(0, n_sampled - len(planned)):],
+                args, flags, full_scan, header_guarded, jobs, ast_cache_dir)
+        else:
+            for filename in to_parse:
+                if filename in self.parsed:
+                    continue
 
-            do_full_scan = any(fnmatch(filename, p) for p in full_scan_patterns)
-            if do_full_scan:
                 debug('scanning %s' % filename)
 
-                tu = index.parse(filename, args=args, options=flags)
-
-                for diag in tu.diagnostics:
-                    s = diag.format()
-                    warn('clang-diagnostic', 'Clang issue : %s' % str(diag))
+                tu = sampled.pop(filename, None)
+                if tu is None:
+                    tu = self.__parse_tu(index, filename, args, flags)
+                self.__scan_parsed_tu(filename, tu, full_scan, header_guarded)
 
-                self.__parse_file (filename, tu, full_scan)
-                if (cindex.conf.lib.clang_isFileMultipleIncludeGuarded(tu, tu.get_file(filename))):
-                    header_guarded.add(filename)
+        if to_parse:
+            max_rss = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss +
+                       resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+            debug('extracted symbols from %d files in %.2fs with the %s parse '
+                  'profile, max RSS %d kB' % (len(to_parse),
+                                              time.time() - start_time,
+                                              parse_profile, max_rss))
 
-                for include in tu.get_includes():
-                    fname = os.path.abspath(str(include.include))
-                    if (cindex.conf.lib.clang_isFileMultipleIncludeGuarded(tu, tu.get_file(fname))):
-                        if fname in self.filenames:
-                            header_guarded.add(fname)
-                    self.__parse_file (fname, tu, full_scan)
+        self.__log_type_names()
 
         if not full_scan:
-            for filename in filenames:
-                with open (filename, 'rb') as f:
-                    skip_next_symbol = filename in header_guarded
-                    debug('Getting comments in %s' % filename)
-                    lines = [unicode_dammit(l) for l in f.readlines()]
-                    cs = extract_comments (''.join(lines))
-                    for c in cs:
-                        if c[3]:
-                            line = lines[c[1] - 1]
-
-                            comment = (len(line) - len(line.lstrip(' '))) * ' ' + c[0]
-                            block = self.__raw_comment_parser.parse_comment(comment,
-                                filename, c[1], c[2], self.project.include_paths)
-                            if block is not None:
-                                self.app.database.add_comment(block)
-                        elif not skip_next_symbol:
-                            if filename.endswith('.h'):
-                                self.__create_macro_from_raw_text(c, filename)
-                        else:
-                            skip_next_symbol = False
+            self.__scan_comments(filenames, header_guarded, jobs)
 
         return True
 
+    def update(self, filenames, unsaved_files=None):
+        """
+        Regenerates the symbols and comments of `filenames` after they
+        changed, reparsing the translation units a previous scan with
+        keep_tus extracted them from. Only the symbols of the changed
+        files are recreated.
+
+        unsaved_files is passed to TranslationUnit.reparse, our own
+        text extraction still reads files from disk.
+
+        Returns the files no kept translation unit covered, these need
+        a regular scan.
+        """
+        missing = []
+        reparsed = set()
+        self.removed_symbols = {}
+        self.scanned_files = set()
+        self.__reset_type_names()
+
+        for filename in filenames:
+            tu = self.__kept_tus.get(filename)
+            if tu is None:
+                missing.append(filename)
+                continue
+
+            if tu not in reparsed:
+                debug('reparsing %s' % tu.spelling)
+                tu.reparse(unsaved_files)
+                reparsed.add(tu)
+
+            previous = self.__file_symbols.pop(filename, set())
+            for name in previous:
+                self.symbols.pop(name, None)
+            self.parsed.discard(filename)
+            self.__parse_file(filename, tu, False)
+
+            removed = previous - self.__file_symbols.get(filename, set())
+            if removed:
+                self.removed_symbols[filename] = removed
+
+            if cindex.conf.lib.clang_isFileMultipleIncludeGuarded(
+                    tu, tu.get_file(filename)):
+                self.__header_guarded.add(filename)
+            else:
+                self.__header_guarded.discard(filename)
+
+        self.__log_type_names()
+        self.__scan_comments([f for f in filenames if f not in missing],
+                             self.__header_guarded)
+
+        return missing
+
+    def __scan_comments(self, filenames, header_guarded, jobs=1):
+        if jobs > 1 and len(filenames) > 1:
+            try:
+                context = multiprocessing.get_context('fork')
+            except ValueError:
+                context = None
+
+            if context is not None:
+                self.__scan_comments_parallel(context, filenames,
+                                              header_guarded, jobs)
+                return
+
+        for filename in filenames:
+            debug('Getting comments in %s' % filename)
+            items = extract_file_comments(self.__raw_comment_parser,
+                                          filename, self.project.include_paths,
+                                          self.__comment_cache)
+            self.__add_file_comments(filename, items, header_guarded)
+
+    def __scan_comments_parallel(self, context, filenames, header_guarded,
+                                 jobs):
+        global _COMMENT_PARSER, _COMMENT_INCLUDE_PATHS, _COMMENT_CACHE
+
+        info('extracting comments from %d files with %d jobs' %
+             (len(filenames), jobs))
+        _COMMENT_PARSER = self.__raw_comment_parser
+        _COMMENT_INCLUDE_PATHS = self.project.include_paths
+        _COMMENT_CACHE = self.__comment_cache
+        pool = context.Pool(jobs)
+        try:
+            # Comments and macros are added in the same order as with a
+            # serial scan, see __merge_parallel_results
+            for filename, items, warnings in pool.imap(
+                    _extract_comments_worker, filenames):
+                for code, message, kwargs in warnings:
+                    Logger.warn(code, message, **kwargs)
+                self.__add_file_comments(filename, items, header_guarded)
+        finally:
+            pool.close()
+            pool.join()
+            _COMMENT_PARSER = None
+            _COMMENT_INCLUDE_PATHS = None
+            _COMMENT_CACHE = None
+
+    def __add_file_comments(self, filename, items, header_guarded):
+        skip_next_symbol = filename in header_guarded
+        for kind, item in items:
+            if kind == 'comment':
+                self.app.database.add_comment(item)
+            elif not skip_next_symbol:
+                if filename.endswith('.h'):
+                    self.__create_macro_from_raw_text(item, filename)
+            else:
+                skip_next_symbol = False
+        # Comments come last, after the symbols of every scanned file
+        self.scanned_files.add(filename)
+
+    @property
+    def header_guarded(self):
+        return self.__header_guarded
+
+    def scan_comments(self, filenames, header_guarded, jobs=1,
+                      comment_cache_dir=None):
+        """
+        Only extracts the comments and macros of `filenames`, for files
+        whose code did not change since their symbols were extracted.
+        """
+        if comment_cache_dir:
+            self.__comment_cache = CommentCache(comment_cache_dir)
+        self.__scan_comments(filenames, header_guarded, jobs)
+
     def set_extension(self, extension):
         self.__doc_db = extension
 
+    def init_worker(self, filenames, args, flags, full_scan, all_sources,
+                    ast_cache_dir, file_args, header_flags):
+        self.filenames = filenames
+        self.__file_args = file_args
+        self.__header_flags = header_flags
+        self.__worker_args = args
+        self.__worker_flags = flags
+        self.__worker_full_scan = full_scan
+        self.__all_sources = all_sources
+        self.__include_graph = IncludeGraph(self.__get_include_dirs(args))
+        self.__recorder = self.__doc_db
+        if ast_cache_dir:
+            self.__ast_cache = ASTCache(ast_cache_dir)
+
+    def scan_tu_to_records(self, filename):
+        self.symbols = {}
+        self.parsed = set({})
+        # filename -> project headers it (transitively) includes
+        self.dependencies = {}
+        self.__recorded_files = []
+        header_guarded = set()
+
+        debug('scanning %s' % filename)
+
+        tu = self.__parse_tu(self.__session.index, filename,
+                             self.__worker_args, self.__worker_flags)
+        diagnostics = self.__scan_tu(filename, tu, self.__worker_full_scan,
+                                     header_guarded)
+
+        return (filename, diagnostics, self.__recorded_files, header_guarded,
+                self.dependencies)
+
+    def __scan_parsed_tu(self, filename, tu, full_scan, header_guarded):
+        if filename in self.parsed:
+            return
+
+        for diag in self.__scan_tu(filename, tu, full_scan, header_guarded):
+            warn('clang-diagnostic', 'Clang issue : %s' % diag)
+
+    def __add_pch_args(self, index, filenames, args, flags, headers,
+                       pch_dir, sampled):
+        if not headers:
+            headers = self.__detect_pch_headers(
+                index, filenames[:PCH_SAMPLE_SIZE], args, flags, sampled)
+
+        if not headers:
+            return args
+
+        debug('precompiling %s' % ', '.join(headers))
+        pch = PCHCache(pch_dir).get(index, headers, args, flags)
+        if pch is None:
+            warn('clang-flags', 'Could not precompile %s' % ', '.join(headers))
+            return args
+
+        return args + ['-include-pch', pch]
+
+    def __detect_pch_headers(self, index, filenames, args, flags, sampled):
+        project_files = set(self.filenames) | set(self.__all_sources)
+        counts = {}
+        headers = []
+
+        for filename in filenames:
+            tu = self.__parse_tu(index, filename, args, flags)
+            sampled[filename] = tu
+            seen = set()
+            for include in tu.get_includes():
+                source = os.path.abspath(str(include.source))
+                header = os.path.abspath(str(include.include))
+                if source not in project_files or header in project_files:
+                    continue
+                if header in seen:
+                    continue
+                seen.add(header)
+                if header not in counts:
+                    headers.append(header)
+                    counts[header] = 0
+                counts[header] += 1
+
+        # External headers directly included by at least half of the sample
+        threshold = (len(filenames) + 1) // 2
+        return [header for header in headers if counts[header] >= threshold]
+
+    def __get_file_args(self, build_dir, filenames, base_args):
+        if not build_dir:
+            return {}
+
+        # Headers outside of the directories of the project, those of
+        # its dependencies, are not scanned and need no flags
+        project_files = set(filenames) | set(self.__all_sources)
+        roots = set(os.path.dirname(f) for f in project_files)
+        try:
+            compile_flags = CompileFlags(build_dir, roots)
+        except cindex.CompilationDatabaseError:
+            warn('clang-flags', 'Could not load the compilation database '
+                 'in %s' % build_dir)
+            return {}
+
+        file_args = {}
+        for filename in filenames:
+            flags = compile_flags.get(filename)
+            if flags is None:
+                debug('No compile command for %s, using global flags' %
+                      filename)
+                continue
+            file_args[filename] = base_args + flags
+
+        return file_args
+
+    def __parse_tu(self, index, filename, args, flags):
+        args = self.__file_args.get(filename, args)
+        if filename.endswith('.h'):
+            flags |= self.__header_flags
+
+        if self.__ast_cache is not None:
+            tu = self.__ast_cache.load(index, filename, args, flags)
+            if tu is not None:
+                debug('loaded %s from the AST cache' % filename)
+                return tu
+
+        start_time = time.time()
+        tu = index.parse(filename, args=args, options=flags)
+        debug('parsed %s in %.3fs' % (filename, time.time() - start_time))
+
+        if self.__ast_cache is not None:
+            self.__ast_cache.save(filename, args, flags, tu)
+
+        return tu
+
+    def __get_include_dirs(self, args):
+        include_dirs = include_dirs_from_args(args)
+        for file_args in self.__file_args.values():
+            for dir_ in include_dirs_from_args(file_args):
+                if dir_ not in include_dirs:
+                    include_dirs.append(dir_)
+        return include_dirs
+
+    def __plan_tus(self, filenames, args):
+        if len(filenames) < 2:
+            return filenames, []
+
+        planned, unplanned = plan_translation_units(
+            filenames, self.__get_include_dirs(args),
+            self.__include_graph.directives)
+        debug('planned %d translation units to cover %d files' %
+              (len(planned), len(filenames)))
+        return planned, unplanned
+
+    def __scan_tus_parallel(self, planned, unplanned, args, flags, full_scan,
+                            header_guarded, jobs, ast_cache_dir):
+        info('parsing %d translation units with %d jobs' % (len(planned),
+                                                           jobs))
+        pool = multiprocessing.Pool(jobs, _init_tu_worker,
+                                    (self.filenames, args, flags, full_scan,
+                                     self.__all_sources, ast_cache_dir,
+                                     self.__file_args, self.__header_flags))
+        try:
+            self.__merge_parallel_results(pool, planned, header_guarded)
+            # Only parse what the planned translation units did not cover
+            remaining = [f for f in unplanned if f not in self.parsed]
+            if remaining:
+                debug('parsing %d uncovered translation units' %
+                      len(remaining))
+                self.__merge_parallel_results(pool, remaining,
+                                              header_guarded)
+        finally:
+            pool.close()
+            pool.join()
+
+    def __merge_parallel_results(self, pool, filenames, header_guarded):
+        # imap hands results back in submission order, merging them
+        # in that order keeps the output identical to a serial scan
+        for filename, diagnostics, files, guarded, dependencies in pool.imap(
+                _scan_tu_worker, filenames):
+            if filename in self.parsed:
+                continue
+
+            for diag in diagnostics:
+                warn('clang-diagnostic', 'Clang issue : %s' % diag)
+
+            header_guarded.update(guarded)
+            for fname, headers in dependencies.items():
+                self.dependencies.setdefault(fname, headers)
+            for fname, units in files:
+                self.__merge_file_units(fname, units)
+
+    def __merge_file_units(self, filename, units):
+        if filename in self.parsed:
+            return
+
+        self.parsed.add(filename)
+
+        for unit in units:
+            if unit.key in self.symbols:
+                continue
+
+            sym = replay_unit(unit, self.__doc_db)
+            if sym is not None:
+                self.symbols[sym.unique_name] = sym
+
+    def __scan_tu(self, filename, tu, full_scan, header_guarded):
+        diagnostics = [str(diag) for diag in tu.diagnostics]
+
+        self.__parse_file (filename, tu, full_scan)
+        if (cindex.conf.lib.clang_isFileMultipleIncludeGuarded(tu, tu.get_file(filename))):
+            header_guarded.add(filename)
+
+        includes = {}
+        for include in tu.get_includes():
+            fname = os.path.abspath(str(include.include))
+            includes.setdefault(os.path.abspath(str(include.source)),
+                                []).append(fname)
+            if (cindex.conf.lib.clang_isFileMultipleIncludeGuarded(tu, tu.get_file(fname))):
+                if fname in self.filenames:
+                    header_guarded.add(fname)
+            self.__parse_file (fname, tu, full_scan)
+
+        self.__record_dependencies(filename, includes)
+
+        return diagnostics
+
+    def __record_dependencies(self, filename, includes):
+        project_files = set(self.filenames) | set(self.__all_sources)
+
+        fnames = [filename]
+        for source, headers in includes.items():
+            fnames.append(source)
+            fnames.extend(headers)
+
+        for fname in fnames:
+            if fname not in project_files or fname in self.dependencies:
+                continue
+
+            headers = set()
+            stack = list(includes.get(fname, ()))
+            if self.__include_graph is not None:
+                # A header the translation unit had already included
+                # doesn't show in libclang's edges
+                stack.extend(self.__include_graph.closure(
+                    fname, restrict_to=project_files))
+            while stack:
+                header = stack.pop()
+                if header in headers or header == fname:
+                    continue
+                headers.add(header)
+                stack.extend(includes.get(header, ()))
+
+            self.dependencies[fname] = sorted(h for h in headers
+                                              if h in project_files)
+
     def __parse_file (self, filename, tu, full_scan):
         if filename in self.parsed:
             return
@@ -191,20 +859,31 @@ class ClangScanner(object):
 
         debug('scanning %s' % filename)
 
-        start = tu.get_location (filename, 0)
-        end = tu.get_location (filename, int(os.path.getsize(filename)))
-        extent = cindex.SourceRange.from_locations (start, end)
-        cursors = self.__get_cursors(tu, extent)
+        if self.__keep_tus:
+            self.__kept_tus[filename] = tu
 
-        # Happens with empty source files
-        if cursors is None:
-            return
+        self.__current_file = filename
+        self.__delimiters.pop(filename, None)
 
-        if filename in self.filenames:
+        walker = get_native_walker()
+        if walker is not None:
+            cursors = self.__get_distinct_cursors(walker, tu, filename)
+        else:
+            cursors = self.__get_cursors(tu, filename)
+
+        # Happens with empty source files
+        if cursors is not None:
             self.__create_symbols (cursors, tu)
 
-    # That's the fastest way of obtaining our ast nodes for a given filename
-    def __get_cursors (self, tu, extent):
+        if self.__recorder is not None:
+            self.__recorded_files.append(
+                (filename, self.__recorder.pop_units()))
+
+    def __tokenize_file(self, tu, filename):
+        start = tu.get_location (filename, 0)
+        end = tu.get_location (filename, int(os.path.getsize(filename)))
+        extent = cindex.SourceRange.from_locations (start, end)
+
         tokens_memory = POINTER(cindex.Token)()
         tokens_count = c_uint()
 
@@ -213,17 +892,101 @@ class ClangScanner(object):
 
         count = int(tokens_count.value)
 
+        if count < 1:
+            return None, 0
+
+        # Disposes of the tokens once collected
+        tokens_memory.group = cindex.TokenGroup(tu, tokens_memory,
+                                                tokens_count)
+        return tokens_memory, count
+
+    # That's the fastest way of obtaining our ast nodes for a given filename
+    def __get_cursors (self, tu, filename):
+        tokens_memory, count = self.__tokenize_file(tu, filename)
+
         if count < 1:
             return
 
         cursors = (cindex.Cursor * count)()
-        cindex.conf.lib.clang_annotateTokens (tu, tokens_memory, tokens_count,
+        cindex.conf.lib.clang_annotateTokens (tu, tokens_memory, count,
                 cursors)
 
+        # We have the tokens of the whole file at hand, index the field
+        # delimiters now rather than tokenizing each struct again later
+        self.__delimiters[filename] = self.__index_delimiters(
+            tu, tokens_memory, count)
+
         return cursors
 
+    # Same as __get_cursors without the cursors of a declaration repeated
+    # for each of its tokens, in C
+    def __get_distinct_cursors(self, walker, tu, filename):
+        data, count, comments = walker.annotate_file(
+            cast(tu.obj, c_void_p).value, filename,
+            int(os.path.getsize(filename)))
+
+        if count < 1:
+            return None
+
+        lines = []
+        values = []
+        for line, comment in comments:
+            comment = ''.join(comment.split())
+            if comment in FIELD_DELIMITERS:
+                lines.append(line)
+                values.append(FIELD_DELIMITERS[comment])
+        self.__delimiters[filename] = lines, values
+
+        return (cindex.Cursor * (len(data) // sizeof(cindex.Cursor))) \
+            .from_buffer_copy(data)
+
+    def __index_delimiters(self, tu, tokens, count):
+        lines = []
+        values = []
+        comment_kind = cindex.TokenKind.COMMENT.value
+        lib = cindex.conf.lib
+        for i in range(count):
+            tok = tokens[i]
+            if lib.clang_getTokenKind(tok) != comment_kind:
+                continue
+            comment = ''.join(str(lib.clang_getTokenSpelling(tu, tok)).split())
+            if comment in FIELD_DELIMITERS:
+                lines.append(lib.clang_getTokenLocation(tu, tok).line)
+                values.append(FIELD_DELIMITERS[comment])
+        return lines, values
+
+    def __get_delimiters(self, tu, filename, start, end):
+        """
+        Returns the (is_public, line) field delimiters between lines
+        `start` and `end` of `filename`, both included.
+        """
+        index = self.__delimiters.get(filename)
+        if index is None:
+            tokens_memory, count = self.__tokenize_file(tu, filename)
+            index = self.__index_delimiters(tu, tokens_memory, count)
+            self.__delimiters[filename] = index
+
+        lines, values = index
+        first = bisect_left(lines, start)
+        last = bisect_right(lines, end)
+        return [(values[i], lines[i]) for i in range(first, last)]
+
     def __create_symbols(self, nodes, tu):
-        for node in nodes:
+        # clang_annotateTokens gives us one cursor per token, the same
+        # declaration thus shows up once for each of its tokens: only
+        # visit each cursor once, and walk children with an explicit
+        # stack rather than recursing.
+        seen = set()
+        visited = 0
+        stack = [iter(nodes)]
+
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+
+            visited += 1
             node._tu = tu
 
             # This is dubious, needed to parse G_DECLARE_FINAL_TYPE
@@ -237,12 +1000,18 @@ class ClangScanner(object):
                 if not str(node.location.file) in self.filenames:
                     continue
 
+            if node in seen:
+                continue
+            seen.add(node)
+
             if node.spelling in self.symbols:
                 continue
 
             sym = None
+            key = node.spelling
             func_dec = self.__getFunctionDeclNode(node)
             if func_dec and func_dec.spelling not in self.symbols:
+                key = func_dec.spelling
                 sym = self.__create_function_symbol(func_dec)
             elif node.kind == cindex.CursorKind.VAR_DECL:
                 sym = self.__create_exported_variable_symbol (node)
@@ -253,9 +1022,20 @@ class ClangScanner(object):
             elif node.kind == cindex.CursorKind.ENUM_DECL and node.spelling:
                 sym = self.__create_enum_symbol(node)
 
-            if sym is not None:
-                self.symbols[sym.unique_name] = sym
-            self.__create_symbols(node.get_children(), tu)
+            self.__register_symbol(key, sym)
+            stack.append(iter(node.get_children()))
+
+        debug('%s: visited %d cursors, %d unique' % (self.__current_file,
+                                                     visited, len(seen)))
+
+    def __register_symbol(self, key, sym):
+        if sym is not None:
+            self.symbols[sym.unique_name] = sym
+            if self.__keep_tus:
+                self.__file_symbols.setdefault(
+                    self.__current_file, set()).add(sym.unique_name)
+        if self.__recorder is not None:
+            self.__recorder.end_unit(key, sym)
 
     def __getFunctionDeclNode(self, node):
         if not node.location.file:
@@ -282,7 +1062,44 @@ class ClangScanner(object):
         if type_.is_volatile_qualified():
             tokens.append ('volatile ')
 
+    def __reset_type_names(self):
+        # (kind, spelling) -> tuple of type tokens
+        self.__type_names = {}
+        # display name -> Link, shared by all the tokens referring to it
+        self.__type_links = {}
+        self.__type_name_hits = 0
+        self.__type_name_misses = 0
+
+    def __log_type_names(self):
+        total = self.__type_name_hits + self.__type_name_misses
+        if total:
+            debug('rendered %d C types, %d cache hits (%.1f%%)' % (
+                total, self.__type_name_hits,
+                100.0 * self.__type_name_hits / total))
+
+    def __get_type_link(self, name):
+        link = self.__type_links.get(name)
+        if link is None:
+            link = Link (None, name, name)
+            self.__type_links[name] = link
+        return link
+
     def make_c_style_type_name (self, type_):
+        # The spelling of a type includes its qualifiers and pointers,
+        # and is all the tokens depend on within a scan
+        key = (type_.kind, type_.spelling)
+        tokens = self.__type_names.get(key)
+        if tokens is not None:
+            self.__type_name_hits += 1
+            return list(tokens)
+
+        self.__type_name_misses += 1
+        tokens = self.__make_c_style_type_name(type_)
+        if key[1]:
+            self.__type_names[key] = tuple(tokens)
+        return tokens
+
+    def __make_c_style_type_name (self, type_):
         tokens = []
         while (type_.kind == cindex.TypeKind.POINTER):
             self.__apply_qualifiers(type_, tokens)
@@ -291,14 +1108,14 @@ class ClangScanner(object):
 
         if type_.kind == cindex.TypeKind.TYPEDEF:
             d = type_.get_declaration ()
-            link = Link (None, d.displayname, d.displayname)
+            link = self.__get_type_link(d.displayname)
 
             tokens.append (link)
             self.__apply_qualifiers(type_, tokens)
         elif type_.kind == cindex.TypeKind.UNEXPOSED:
             d = type_.get_declaration()
             if d.spelling:
-                tokens.append(Link(None, d.displayname, d.displayname))
+                tokens.append(self.__get_type_link(d.displayname))
             else:
                 tokens.append('__UNKNOWN__')
             if d.kind == cindex.CursorKind.STRUCT_DECL:
@@ -337,18 +1154,17 @@ class ClangScanner(object):
         return sym
 
     def __parse_public_fields (self, decl):
-        tokens = decl.translation_unit.get_tokens(extent=decl.extent)
-        delimiters = []
-
         filename = str(decl.location.file)
 
         start = decl.extent.start.line
         end = decl.extent.end.line + 1
-        original_lines = [linecache.getline(filename, i).rstrip() for i in range(start,
-            end)]
+        original_lines = self.__sources.get_lines(filename, start, end)
+
+        delimiters = self.__get_delimiters(decl.translation_unit, filename,
+                                           start, end - 1)
 
         public = True
-        if (self.__locate_delimiters(tokens, delimiters)):
+        if any(is_public for is_public, _ in delimiters):
             public = False
 
         children = []
@@ -403,23 +1219,6 @@ class ClangScanner(object):
 
         return ('\n'.join(final_text), public_children)
 
-    def __locate_delimiters (self, tokens, delimiters):
-        public_pattern = "/*<public>*/"
-        private_pattern = "/*<private>*/"
-        protected_pattern = "/*<protected>*/"
-        had_public = False
-        for tok in tokens:
-            if tok.kind == cindex.TokenKind.COMMENT:
-                comment = ''.join(tok.spelling.split())
-                if public_pattern == comment:
-                    had_public = True
-                    delimiters.append((True, tok.location.line))
-                elif private_pattern == comment:
-                    delimiters.append((False, tok.location.line))
-                elif protected_pattern == comment:
-                    delimiters.append((False, tok.location.line))
-        return had_public
-
     def __create_struct_symbol (self, node, spelling=None):
         spelling = spelling or node.spelling
         raw_text, public_fields = self.__parse_public_fields (node)
@@ -460,8 +1259,8 @@ class ClangScanner(object):
 
         start = node.extent.start.line
         end = node.extent.end.line + 1
-        original_lines = [linecache.getline(str(node.location.file), i).rstrip() for i in range(start,
-            end)]
+        original_lines = self.__sources.get_lines(str(node.location.file),
+                                                  start, end)
         raw_text = '\n'.join(original_lines)
 
         return self.__doc_db.get_or_create_symbol(EnumSymbol, members=members,
@@ -564,14 +1363,10 @@ class ClangScanner(object):
         return sym
 
     def __create_exported_variable_symbol (self, node):
-        l = linecache.getline (str(node.location.file), node.location.line)
-        split = l.split()
-
         start = node.extent.start.line
         end = node.extent.end.line + 1
         filename = str(node.location.file)
-        original_lines = [linecache.getline(filename, i).rstrip() for i in range(start,
-            end)]
+        original_lines = self.__sources.get_lines(filename, start, end)
         original_text = '\n'.join(original_lines)
 
         type_tokens = self.make_c_style_type_name(node.type)
@@ -587,7 +1382,7 @@ def flags_from_config(config):
     flags = []
 
     for package in config.get('pkg_config_packages') or []:
-        flags.extend(pkgconfig.cflags(package).split(' '))
+        flags.extend(get_pkg_config_cflags(package).split(' '))
 
     extra_flags = config.get('extra_c_flags') or []
     for flag in extra_flags:
@@ -610,10 +1405,22 @@ class CExtension(Extension):
         Extension.__init__(self, app, project)
         self.project = project
         self.flags = []
+        self.jobs = 1
+        self.ast_cache_dir = None
+        self.precompiled_headers = None
+        self.keep_tus = False
+        self.compilation_database = None
+        self.parse_profile = 'default'
+        self.__scanned = False
         if not CExtension.connected:
             inclusions.include_signal.connect(self.__include_file_cb)
             CExtension.connected = True
-        self.scanner = ClangScanner(self.app, self.project, self)
+        self.__session = ScannerSession(self.project)
+        self.scanner = ClangScanner(self.app, self.project, self,
+                                    self.__session)
+        self.__inclusion_scanner = None
+        self.__function_tags = None
+        self.__inclusions = None
 
     # pylint: disable=no-self-use
     def __include_file_cb(self, include_path, line_ranges, symbol_name):
@@ -622,41 +1429,73 @@ class CExtension(Extension):
 
         if not line_ranges:
             line_ranges = [(1, -1)]
+
+        if self.__inclusions is None:
+            self.__inclusions = InclusionCache(
+                os.path.join(self.__get_cache_dir(), 'inclusions'))
+        res = self.__inclusions.load(include_path, symbol_name, line_ranges)
+        if res is not None:
+            return res, 'c'
+
         symbol = self.app.database.get_symbol(symbol_name)
         if symbol and symbol.filename != include_path:
             symbol = None
 
-        if not symbol:
-            scanner = ClangScanner(self.app, self.project, self)
-            scanner.scan([include_path], self.flags,
-                         self.app.incremental, True, ['*.c', '*.h'])
+        if symbol:
+            extent = (symbol.extent_start, symbol.extent_end)
+        else:
+            extent = self.__lookup_function_tag(include_path, symbol_name)
+
+        if not extent and \
+                include_path not in self.__session.included_sources:
+            self.__session.included_sources.add(include_path)
+            # Not self.scanner, whose state is kept for the next build
+            # with --c-keep-translation-units
+            if self.__inclusion_scanner is None:
+                self.__inclusion_scanner = ClangScanner(
+                    self.app, self.project, self, self.__session)
+            self.__inclusion_scanner.scan(
+                [include_path], self.flags, self.app.incremental, True,
+                ['*.c', '*.h'])
             symbol = self.app.database.get_symbol(symbol_name)
+            if symbol:
+                extent = (symbol.extent_start, symbol.extent_end)
 
-            if not symbol:
-                warn('bad-c-inclusion',
-                     "Trying to include symbol %s but could not be found in "
-                     "%s" % (symbol_name, include_path))
-                return None
-
-        res = ''
-        for n, (start, end) in enumerate(line_ranges):
-            if n != 0:
-                res += "\n...\n"
+        if not extent:
+            warn('bad-c-inclusion',
+                 "Trying to include symbol %s but could not be found in "
+                 "%s" % (symbol_name, include_path))
+            return None
 
-            start += symbol.extent_start - 2
+        sources = self.__session.source_buffers
+        snippets = []
+        for start, end in line_ranges:
+            start += extent[0] - 1
             if end > 0:
-                end += (symbol.extent_start - 1)  # We are inclusive here
+                end += extent[0]  # We are inclusive here
             else:
-                end = symbol.extent_end
+                end = extent[1] + 1
 
-            with open(include_path, "r") as _:
-                res += "\n".join(_.read().split("\n")[start:end])
+            snippets.append(sources.get_text(include_path, start, end) or '')
 
+        res = "\n...\n".join(snippets)
         if res:
+            self.__inclusions.save(include_path, symbol_name, line_ranges,
+                                   res)
             return res, 'c'
 
         return None
 
+    def __lookup_function_tag(self, include_path, symbol_name):
+        # Much cheaper than going through clang, which we only do when
+        # the definition is hidden behind a macro for example
+        if self.__function_tags is None:
+            self.__function_tags = FunctionTagIndex(
+                os.path.join(self.__get_cache_dir(), 'function-tags'))
+            self.__function_tags.index_all(
+                f for f in self.sources if f.endswith('.c'))
+        return self.__function_tags.lookup(include_path, symbol_name)
+
     def _get_smart_index_title(self):
         return 'C API Reference'
 
@@ -667,9 +1506,91 @@ class CExtension(Extension):
     def setup(self):
         super(CExtension, self).setup()
         stale, unlisted = self.get_stale_files(self.sources)
-        self.scanner.scan(stale, self.flags,
-                          self.app.incremental, False, ['*.h'],
-                          all_sources=self.sources)
+
+        # Kept next to the database whose contents it describes, code
+        # hashes only help later incremental builds
+        fingerprints = FingerprintStore(
+            os.path.join(self.app.private_folder, 'c-extension',
+                         'fingerprints.json'),
+            code_hashes=self.app.incremental)
+        comments_only = []
+        if self.app.incremental:
+            # mtimes change with a branch switch even if the contents
+            # don't, and don't account for the headers a file includes
+            changed = set(f for f in stale if fingerprints.has_changed(f))
+            stale = [f for f in self.sources
+                     if fingerprints.is_stale(f, changed)]
+            # The symbols of these are still up to date, no need to
+            # go through clang
+            comments_only = [f for f in stale
+                             if fingerprints.changed_in_comments_only(
+                                 f, changed)]
+            stale = [f for f in stale if f not in comments_only]
+            debug('%d stale C source files, %d with only comment changes'
+                  % (len(stale), len(comments_only)))
+
+        try:
+            self.__scan_stale_files(stale, comments_only, fingerprints)
+        finally:
+            # Whatever got scanned before a failure needn't be again
+            for filename in stale:
+                if filename in self.scanner.scanned_files:
+                    fingerprints.record(
+                        filename, self.scanner.dependencies.get(filename),
+                        filename in self.scanner.header_guarded)
+            for filename in comments_only:
+                if filename in self.scanner.scanned_files:
+                    fingerprints.record(filename)
+            fingerprints.save()
+
+    def __scan_stale_files(self, stale, comments_only, fingerprints):
+        to_scan = stale
+        merge = False
+        if self.keep_tus and self.__scanned:
+            # Only what no kept translation unit covers, merged with the
+            # rest so that it stays warm
+            to_scan = self.scanner.update(stale)
+            merge = True
+            self.__forget_removed_symbols()
+
+        if to_scan or not merge:
+            self.__scanned = True
+            self.scanner.scan(to_scan, self.flags,
+                              self.app.incremental, False, ['*.h'],
+                              all_sources=self.sources, jobs=self.jobs,
+                              ast_cache_dir=self.ast_cache_dir,
+                              precompiled_headers=self.precompiled_headers,
+                              pch_dir=self.__get_cache_dir(),
+                              keep_tus=self.keep_tus,
+                              compilation_database=self.compilation_database,
+                              parse_profile=self.parse_profile,
+                              comment_cache_dir=os.path.join(
+                                  self.__get_cache_dir(), 'comments'),
+                              merge=merge)
+
+        if comments_only:
+            self.scanner.scan_comments(
+                comments_only,
+                set(f for f in comments_only
+                    if fingerprints.is_header_guarded(f)),
+                jobs=self.jobs,
+                comment_cache_dir=os.path.join(self.__get_cache_dir(),
+                                               'comments'))
+
+    def __forget_removed_symbols(self):
+        # The database can't drop symbols, but they shouldn't be listed
+        # on the page of the file anymore
+        for filename, names in self.scanner.removed_symbols.items():
+            created = self._created_symbols.get(filename)
+            if created is None:
+                continue
+            for name in names:
+                created.discard(name)
+
+    def __get_cache_dir(self):
+        if self.ast_cache_dir:
+            return self.ast_cache_dir
+        return os.path.join(self.app.private_folder, 'c-extension')
 
     @staticmethod
     def add_arguments (parser):
@@ -682,9 +1603,42 @@ class CExtension(Extension):
                 dest="pkg_config_packages", help="Packages the library depends upon")
         group.add_argument ("--extra-c-flags", action="store", nargs="+",
                 dest="extra_c_flags", help="Extra C flags (-D, -U, ..)")
+        group.add_argument ("--c-jobs", action="store", type=int,
+                dest="c_jobs", help="Number of processes to parse C "
+                "translation units with, default is 1")
+        group.add_argument ("--c-ast-cache-dir", action="store",
+                dest="c_ast_cache_dir", help="Directory where parsed "
+                "translation units are cached between runs")
+        group.add_argument ("--c-pch", action="store_true",
+                dest="c_pch", help="Precompile the external headers most "
+                "sources include, and use that for every parse")
+        group.add_argument ("--c-pch-headers", action="store", nargs="+",
+                dest="c_pch_headers", help="Headers to precompile, implies "
+                "--c-pch, default is to pick them automatically")
+        group.add_argument ("--c-keep-translation-units", action="store_true",
+                dest="c_keep_translation_units", help="Keep translation "
+                "units alive between builds in the same process, and "
+                "reparse them when sources change")
+        group.add_argument ("--c-compilation-database", action="store",
+                dest="c_compilation_database", help="Build directory "
+                "containing a compile_commands.json, sources and the headers "
+                "they include are then parsed with their own flags instead "
+                "of the global ones")
+        group.add_argument ("--c-parse-profile", action="store",
+                choices=PARSE_PROFILES, dest="c_parse_profile",
+                help="How much of headers clang analyses, 'fast' skips "
+                "function bodies, default is 'default'")
 
     def parse_config(self, config):
         super(CExtension, self).parse_config(config)
         self.flags = flags_from_config(config)
+        self.jobs = config.get('c_jobs') or 1
+        self.ast_cache_dir = config.get_path('c_ast_cache_dir')
+        self.precompiled_headers = config.get('c_pch_headers')
+        if self.precompiled_headers is None and config.get('c_pch'):
+            self.precompiled_headers = []
+        self.keep_tus = bool(config.get('c_keep_translation_units'))
+        self.compilation_database = config.get_path('c_compilation_database')
+        self.parse_profile = config.get('c_parse_profile') or 'default'
         for dir_ in config.get_paths('c_include_directories') or []:
             self.flags.append('-I%s' % dir_)
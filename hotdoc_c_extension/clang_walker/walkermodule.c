@@ -0,0 +1,361 @@
+/*
+ * Hotdoc python extension for fast retrieval of C declarations.
+ *
+ * Copyright 2026 agent <agent@local>
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+ */
+
+/*
+ * Tokenizes a file of a translation unit and annotates its tokens, like
+ * ClangScanner.__get_cursors does through the bindings, but only hands
+ * back the first cursor of each distinct declaration, type references
+ * being told apart by the definition they point to. The symbols are
+ * then created from these the same way as from the full list, which
+ * repeats each declaration once per token.
+ *
+ * The translation unit comes from the libclang the python bindings
+ * loaded, this module must thus be linked to that same library, see
+ * libclang_address.
+ */
+
+#ifdef _POSIX_C_SOURCE
+  #undef _POSIX_C_SOURCE
+#endif
+
+#ifdef _XOPEN_SOURCE
+  #undef _XOPEN_SOURCE
+#endif
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include <clang-c/Index.h>
+
+#if PY_MAJOR_VERSION >= 3
+#define BYTES_FORMAT "y#"
+#else
+#define BYTES_FORMAT "s#"
+#endif
+
+typedef struct {
+  CXCursor cursor;
+  unsigned hash;
+  int is_reference;
+  int used;
+} SeenEntry;
+
+typedef struct {
+  SeenEntry *entries;
+  size_t size;
+  size_t n_entries;
+} SeenSet;
+
+typedef struct {
+  unsigned line;
+  CXString spelling;
+} Delimiter;
+
+typedef struct {
+  CXCursor *cursors;
+  size_t n_cursors;
+  Delimiter *delimiters;
+  size_t n_delimiters;
+  unsigned n_tokens;
+  int failed;
+} AnnotateResult;
+
+static int
+seen_grow (SeenSet *set)
+{
+  SeenEntry *old = set->entries;
+  size_t old_size = set->size, i;
+
+  set->size = old_size ? old_size * 2 : 256;
+  set->entries = calloc (set->size, sizeof (SeenEntry));
+  if (set->entries == NULL)
+    return 0;
+
+  set->n_entries = 0;
+  for (i = 0; i < old_size; i++) {
+    if (old[i].used) {
+      SeenEntry *entry = &set->entries[old[i].hash & (set->size - 1)];
+      while (entry->used)
+        entry = entry == &set->entries[set->size - 1] ?
+            set->entries : entry + 1;
+      *entry = old[i];
+      set->n_entries++;
+    }
+  }
+
+  free (old);
+  return 1;
+}
+
+/* Returns 1 if added, 0 if already there, -1 when out of memory */
+static int
+seen_add (SeenSet *set, CXCursor cursor, int is_reference)
+{
+  unsigned hash;
+  SeenEntry *entry;
+
+  if ((set->n_entries + 1) * 2 > set->size && !seen_grow (set))
+    return -1;
+
+  hash = clang_hashCursor (cursor);
+  entry = &set->entries[hash & (set->size - 1)];
+  while (entry->used) {
+    if (entry->hash == hash && entry->is_reference == is_reference &&
+        clang_equalCursors (entry->cursor, cursor))
+      return 0;
+    entry = entry == &set->entries[set->size - 1] ? set->entries : entry + 1;
+  }
+
+  entry->cursor = cursor;
+  entry->hash = hash;
+  entry->is_reference = is_reference;
+  entry->used = 1;
+  set->n_entries++;
+  return 1;
+}
+
+/* Whether a comment token, whitespace aside, starts with "/" "*<" */
+static int
+is_delimiter_candidate (const char *spelling)
+{
+  const char *prefix = "/*<";
+
+  for (; *spelling && *prefix; spelling++) {
+    if (*spelling == ' ' || *spelling == '\t' || *spelling == '\n' ||
+        *spelling == '\r')
+      continue;
+    if (*spelling != *prefix)
+      return 0;
+    prefix++;
+  }
+
+  return *prefix == '\0';
+}
+
+static void
+annotate (CXTranslationUnit tu, CXFile file, unsigned size,
+    AnnotateResult *result)
+{
+  CXSourceRange extent;
+  CXToken *tokens = NULL;
+  CXCursor *cursors;
+  SeenSet seen = { 0 };
+  unsigned n_tokens = 0, i;
+
+  extent = clang_getRange (clang_getLocationForOffset (tu, file, 0),
+      clang_getLocationForOffset (tu, file, size));
+  clang_tokenize (tu, extent, &tokens, &n_tokens);
+  result->n_tokens = n_tokens;
+  if (n_tokens == 0)
+    return;
+
+  cursors = malloc (n_tokens * sizeof (CXCursor));
+  result->cursors = malloc (n_tokens * sizeof (CXCursor));
+  result->delimiters = malloc (n_tokens * sizeof (Delimiter));
+  if (cursors == NULL || result->cursors == NULL ||
+      result->delimiters == NULL) {
+    result->failed = 1;
+    goto done;
+  }
+
+  clang_annotateTokens (tu, tokens, n_tokens, cursors);
+
+  for (i = 0; i < n_tokens; i++) {
+    CXCursor cursor = cursors[i];
+    int added;
+
+    if (clang_getTokenKind (tokens[i]) == CXToken_Comment) {
+      CXString spelling = clang_getTokenSpelling (tu, tokens[i]);
+
+      if (is_delimiter_candidate (clang_getCString (spelling))) {
+        Delimiter *delimiter = &result->delimiters[result->n_delimiters++];
+        clang_getExpansionLocation (clang_getTokenLocation (tu, tokens[i]),
+            NULL, &delimiter->line, NULL, NULL);
+        delimiter->spelling = spelling;
+      } else {
+        clang_disposeString (spelling);
+      }
+    }
+
+    /* Type references are resolved again on the python side, only
+     * their first occurrence per definition matters */
+    if (clang_getCursorKind (cursor) == CXCursor_TypeRef) {
+      CXCursor definition = clang_getCursorDefinition (cursor);
+      if (clang_Cursor_isNull (definition))
+        continue;
+      added = seen_add (&seen, definition, 1);
+    } else {
+      added = seen_add (&seen, cursor, 0);
+    }
+
+    if (added < 0) {
+      result->failed = 1;
+      break;
+    }
+
+    if (added)
+      result->cursors[result->n_cursors++] = cursor;
+  }
+
+done:
+  free (seen.entries);
+  free (cursors);
+  clang_disposeTokens (tu, tokens, n_tokens);
+}
+
+static void
+free_result (AnnotateResult *result)
+{
+  size_t i;
+
+  for (i = 0; i < result->n_delimiters; i++)
+    clang_disposeString (result->delimiters[i].spelling);
+
+  free (result->cursors);
+  free (result->delimiters);
+}
+
+static PyObject *
+build_delimiters (AnnotateResult *result)
+{
+  PyObject *list;
+  size_t i;
+
+  list = PyList_New (result->n_delimiters);
+  if (list == NULL)
+    return NULL;
+
+  for (i = 0; i < result->n_delimiters; i++) {
+    PyObject *item = Py_BuildValue ("(Is)", result->delimiters[i].line,
+        clang_getCString (result->delimiters[i].spelling));
+    if (item == NULL) {
+      Py_DECREF (list);
+      return NULL;
+    }
+    PyList_SET_ITEM (list, i, item);
+  }
+
+  return list;
+}
+
+static PyObject *
+walker_annotate_file (PyObject *self, PyObject *args)
+{
+  unsigned long long address;
+  const char *filename;
+  unsigned size;
+  CXTranslationUnit tu;
+  CXFile file;
+  AnnotateResult result;
+  PyObject *delimiters, *ret;
+
+  if (!PyArg_ParseTuple (args, "KsI", &address, &filename, &size))
+    return NULL;
+
+  tu = (CXTranslationUnit) (uintptr_t) address;
+  memset (&result, 0, sizeof (AnnotateResult));
+
+  Py_BEGIN_ALLOW_THREADS
+  file = clang_getFile (tu, filename);
+  if (file != NULL)
+    annotate (tu, file, size, &result);
+  Py_END_ALLOW_THREADS
+
+  if (result.failed) {
+    free_result (&result);
+    return PyErr_NoMemory ();
+  }
+
+  delimiters = build_delimiters (&result);
+  if (delimiters == NULL) {
+    free_result (&result);
+    return NULL;
+  }
+
+  ret = Py_BuildValue ("(" BYTES_FORMAT "IN)",
+      (const char *) result.cursors,
+      (Py_ssize_t) (result.n_cursors * sizeof (CXCursor)),
+      result.n_tokens,
+      delimiters);
+  free_result (&result);
+
+  return ret;
+}
+
+static PyObject *
+walker_libclang_address (PyObject *self, PyObject *args)
+{
+  return PyLong_FromUnsignedLongLong (
+      (unsigned long long) (uintptr_t) &clang_getClangVersion);
+}
+
+static PyMethodDef walker_methods[] = {
+  {"annotate_file", walker_annotate_file, METH_VARARGS,
+   "annotate_file(tu_address, filename, size) -> (cursors, n_tokens, "
+   "delimiters)\n\nThe distinct cursors the tokens of a file are annotated "
+   "with, as the bytes of a CXCursor array, the number of tokens, and the "
+   "(line, spelling) of the comments that may be field delimiters."},
+  {"libclang_address", walker_libclang_address, METH_NOARGS,
+   "The address of clang_getClangVersion in the libclang this module "
+   "is linked to."},
+  {NULL, NULL, 0, NULL}
+};
+
+#if PY_MAJOR_VERSION >= 3
+
+static struct PyModuleDef moduledef = {
+        PyModuleDef_HEAD_INIT,
+        "clang_walker",
+        NULL,
+        0,
+        walker_methods,
+        NULL,
+        NULL,
+        NULL,
+        NULL
+};
+
+#define INITERROR return NULL
+
+PyMODINIT_FUNC
+PyInit_clang_walker(void)
+
+#else
+#define INITERROR return
+
+PyMODINIT_FUNC
+initclang_walker(void)
+#endif
+{
+#if PY_MAJOR_VERSION >= 3
+  PyObject *module = PyModule_Create(&moduledef);
+#else
+  PyObject *module = Py_InitModule("clang_walker", walker_methods);
+#endif
+
+  if (module == NULL)
+    INITERROR;
+
+#if PY_MAJOR_VERSION >= 3
+  return module;
+#endif
+}
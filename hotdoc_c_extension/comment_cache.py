@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Persistent cache of the gtk-doc blocks parsed out of each source file.
+"""
+
+import os
+import pickle
+import shutil
+
+from hotdoc.core.comment import Comment
+from hotdoc.utils.setup_utils import VERSION as HOTDOC_VERSION
+
+from hotdoc_c_extension.utils.hashing import hash_strings
+
+# Bumped when the layout of the entries changes
+FORMAT_VERSION = 2
+
+
+def _get_cache_version():
+    with open(os.path.join(os.path.dirname(__file__), 'VERSION.txt'),
+              'r') as _:
+        version = _.read().strip()
+    return hash_strings(HOTDOC_VERSION, version, str(FORMAT_VERSION),
+                        str(pickle.HIGHEST_PROTOCOL))[:16]
+
+
+def move_comment(comment, delta):
+    """
+    Moves `comment`, and the comments nested in it, `delta` lines.
+    """
+    if comment.lineno != -1:
+        comment.lineno += delta
+    if comment.endlineno != -1:
+        comment.endlineno += delta
+
+    nested = list(comment.params.values()) + list(comment.topics.values())
+    if isinstance(comment.title, Comment):
+        nested.append(comment.title)
+    for child in nested:
+        if isinstance(child, Comment):
+            move_comment(child, delta)
+
+
+class CommentCache(object):
+    """
+    Stores, for each source file, its parsed comment blocks pickled and
+    looked up by a hash of their raw text, so that only the comments
+    that changed since the last build go through the parser again. The
+    warnings emitted while parsing a block are stored along with it.
+
+    A file's entries are replaced as a whole when it's saved again,
+    comments that were removed from it are dropped along the way.
+
+    The blocks are pickled hotdoc objects, whose classes may change
+    with either package: the entries of each version of both are kept
+    in their own directory, the directories of other versions are
+    removed.
+    """
+    def __init__(self, cache_dir):
+        version = _get_cache_version()
+        self.__cache_dir = os.path.join(cache_dir, version)
+        if not os.path.exists(self.__cache_dir):
+            os.makedirs(self.__cache_dir)
+            self.__prune(cache_dir, version)
+
+    @staticmethod
+    def __prune(cache_dir, version):
+        for name in os.listdir(cache_dir):
+            if name == version:
+                continue
+            path = os.path.join(cache_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def __path(self, filename, include_paths):
+        key = hash_strings(filename, *(include_paths or []))
+        return os.path.join(self.__cache_dir, key + '.pickle')
+
+    def load(self, filename, include_paths):
+        """
+        Returns a map of raw comment hashes to pickled entries for
+        `filename`, empty if it has no entry, see unpack.
+        """
+        try:
+            with open(self.__path(filename, include_paths), 'rb') as _:
+                return pickle.load(_)
+        # pylint: disable=broad-except
+        except Exception:
+            return {}
+
+    def save(self, filename, include_paths, entries):
+        path = self.__path(filename, include_paths)
+        # Comments may be extracted by several processes
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as _:
+            pickle.dump(entries, _, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, path)
+
+    @staticmethod
+    def pack(block, lineno, warnings):
+        """
+        Returns the entry for `block`, parsed from a comment starting at
+        `lineno`, with the (code, message, kwargs) `warnings` emitted
+        while parsing it.
+        """
+        return pickle.dumps((lineno, block, warnings),
+                            pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def unpack(entry, lineno):
+        """
+        Returns the block and warnings of `entry` moved to `lineno`, as
+        the same comment may have moved in the file, or None if the
+        entry can't be loaded.
+        """
+        try:
+            old_lineno, block, warnings = pickle.loads(entry)
+        # pylint: disable=broad-except
+        except Exception:
+            return None
+
+        delta = lineno - old_lineno
+        if block is not None:
+            move_comment(block, delta)
+        for _, _, kwargs in warnings:
+            if kwargs.get('lineno', -1) != -1:
+                kwargs['lineno'] += delta
+
+        return block, warnings
+
+    @staticmethod
+    def hash_comment(text):
+        return hash_strings(text)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Per-file compiler flags from a compile_commands.json database.
+"""
+
+import os
+
+from hotdoc_c_extension.clang import cindex
+from hotdoc_c_extension.include_graph import (IncludeGraph,
+                                                include_dirs_from_args)
+
+# Flags with a value that affect how sources are parsed, the others
+# (code generation, warnings, dependency generation, output) are dropped
+KEPT_VALUE_FLAGS = ('-D', '-U', '-I', '-isystem', '-iquote', '-idirafter',
+                    '-include', '-imacros', '-isysroot', '--sysroot',
+                    '-target')
+KEPT_PREFIXES = ('-std=', '-m', '--sysroot=', '--target=')
+KEPT_FLAGS = ('-pthread', '-ansi', '-nostdinc', '-undef')
+# The -f flags that change the language clang parses, any other (code
+# generation, diagnostics, gcc-only or plugin loading) is dropped
+KEPT_F_FLAGS = ('-fno-builtin', '-ffreestanding', '-fms-extensions',
+                '-fno-ms-extensions', '-fms-compatibility', '-fblocks',
+                '-fno-blocks', '-fsigned-char', '-funsigned-char',
+                '-fno-signed-char', '-fno-unsigned-char', '-fshort-enums',
+                '-fno-short-enums', '-fshort-wchar', '-fno-short-wchar',
+                '-fgnu89-inline', '-fno-gnu89-inline', '-fopenmp',
+                '-fdollars-in-identifiers', '-fno-dollars-in-identifiers',
+                '-fasm', '-fno-asm', '-ftrigraphs', '-fno-trigraphs',
+                '-fpack-struct')
+# Same, for those taking a value, as in -fpack-struct=4
+KEPT_F_PREFIXES = ('-fno-builtin-', '-fpack-struct=',
+                   '-fms-compatibility-version=', '-fopenmp=')
+
+# Flags whose value comes as the next argument
+SEPARATE_VALUE_FLAGS = KEPT_VALUE_FLAGS + ('-o', '-MF', '-MT', '-MQ', '-x',
+                                           '-Xclang', '-arch')
+# Flags whose value may also be glued to them
+JOINED_VALUE_FLAGS = ('-D', '-U', '-I', '-isystem', '-iquote', '-idirafter')
+# Flags whose value is a path, relative to the command's directory
+PATH_FLAGS = ('-I', '-isystem', '-iquote', '-idirafter', '-include',
+              '-imacros', '-isysroot', '--sysroot')
+
+
+def clean_arguments(arguments, directory, filename):
+    """
+    Returns the arguments of a compile command that matter to clang
+    when parsing filename, with relative paths made absolute.
+    """
+    result = []
+    # The first argument is the compiler
+    args = list(arguments[1:])
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        i += 1
+
+        value = None
+        if arg in SEPARATE_VALUE_FLAGS:
+            value = args[i] if i < len(args) else ''
+            i += 1
+        else:
+            for flag in JOINED_VALUE_FLAGS:
+                if arg.startswith(flag):
+                    arg, value = flag, arg[len(flag):]
+                    break
+
+        if value is None:
+            if os.path.normpath(os.path.join(directory, arg)) == filename:
+                continue
+            if arg in KEPT_FLAGS or arg in KEPT_F_FLAGS or \
+                    arg.startswith(KEPT_PREFIXES + KEPT_F_PREFIXES):
+                result.append(arg)
+            continue
+
+        if arg not in KEPT_VALUE_FLAGS:
+            continue
+
+        if arg in PATH_FLAGS:
+            value = os.path.normpath(os.path.join(directory, value))
+
+        if arg in JOINED_VALUE_FLAGS:
+            result.append(arg + value)
+        else:
+            result.extend([arg, value])
+
+    return result
+
+
+class CompileFlags(object):
+    """
+    Maps sources to the arguments they were compiled with, and headers to
+    the arguments of a source including them. Only the headers under one
+    of the `roots` directories, if provided, are mapped.
+    """
+    def __init__(self, build_dir, roots=None):
+        self.__flags = {}
+        self.__header_flags = None
+        self.__roots = roots
+
+        database = cindex.CompilationDatabase.fromDirectory(build_dir)
+        commands = database.getAllCompileCommands() or []
+        for command in commands:
+            directory = command.directory
+            filename = os.path.normpath(os.path.join(directory,
+                                                     command.filename))
+            if filename in self.__flags:
+                continue
+            self.__flags[filename] = clean_arguments(
+                list(command.arguments), directory, filename)
+
+    def __map_headers(self):
+        self.__header_flags = {}
+        roots = self.__roots
+        if roots is not None:
+            # Private headers next to the compiled sources lead to the
+            # project headers too
+            roots = set(roots) | set(os.path.dirname(f)
+                                     for f in self.__flags)
+        # Most commands share their include directories
+        graphs = {}
+        directives = {}
+        for source in sorted(self.__flags):
+            arguments = self.__flags[source]
+            include_dirs = tuple(include_dirs_from_args(arguments))
+            graph = graphs.get(include_dirs)
+            if graph is None:
+                graph = IncludeGraph(list(include_dirs), directives)
+                graphs[include_dirs] = graph
+            for header in graph.closure(source, roots=roots):
+                if header not in self.__header_flags:
+                    self.__header_flags[header] = arguments
+
+    def get(self, filename):
+        """
+        Returns the arguments to parse filename with, or None if the
+        database doesn't know about it.
+        """
+        filename = os.path.normpath(filename)
+        if filename in self.__flags:
+            return self.__flags[filename]
+
+        if self.__header_flags is None:
+            self.__map_headers()
+
+        return self.__header_flags.get(filename)
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Content based staleness of the scanned sources.
+"""
+
+import os
+import re
+import json
+import hashlib
+
+from hotdoc_c_extension.c_comment_scanner.comment_table import CommentTable
+from hotdoc_c_extension.utils.encoding import read_scannable_source
+from hotdoc_c_extension.utils.hashing import hash_file
+
+
+# String and character literals, whose braces don't count
+LITERAL_RE = re.compile(br'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'')
+
+
+def _is_free_doc_block(data, start, end, depth):
+    """
+    Whether the comment from `start` to `end` is a gtk-doc block alone
+    on its lines, outside of any declaration: nothing clang extracts
+    contains its text.
+    """
+    if depth != 0 or not data.startswith(b'/**', start) or \
+            data.startswith(b'/**<', start):
+        return False
+
+    line_start = data.rfind(b'\n', 0, start) + 1
+    line_end = data.find(b'\n', end)
+    if line_end == -1:
+        line_end = len(data)
+    return not data[line_start:start].strip() and \
+        not data[end:line_end].strip()
+
+
+def hash_code(filename):
+    """
+    Returns a hash of `filename` leaving out the text of the gtk-doc
+    blocks found outside of declarations. Other comments are kept:
+    field delimiters change the members of structs, and the raw text
+    of a declaration includes the comments inside it.
+
+    The newlines of the left out blocks are kept: a comment gaining or
+    losing lines moves the code after it, and the line numbers recorded
+    for its symbols.
+    """
+    try:
+        data, _ = read_scannable_source(filename)
+    except (IOError, OSError):
+        return None
+
+    table = CommentTable(data)
+    sha = hashlib.sha1()
+    pos = 0
+    # Nesting of braces and parentheses in the code before each item
+    depth = 0
+    code_start = 0
+    for start, end, is_comment in zip(table.starts, table.ends,
+                                      table.is_comment):
+        code = LITERAL_RE.sub(b'', data[code_start:start])
+        depth += code.count(b'{') + code.count(b'(')
+        depth -= code.count(b'}') + code.count(b')')
+        code_start = end
+
+        if is_comment and _is_free_doc_block(data, start, end, depth):
+            sha.update(data[pos:start])
+            sha.update(b'\n' * data.count(b'\n', start, end))
+            pos = end
+    sha.update(data[pos:])
+    return sha.hexdigest()
+
+
+class FingerprintStore(object):
+    """
+    Remembers the content hash of each scanned source, along with the
+    hashes of the project headers it included when it was scanned.
+
+    A source is stale when it or one of these headers changed, whatever
+    their mtimes say. A hash leaving out its documentation blocks tells
+    whether only these changed, see hash_code. It is only computed for sources whose contents
+    changed, and not at all without `code_hashes`.
+    """
+    def __init__(self, path, code_hashes=True):
+        self.__path = path
+        self.__code_hashes = code_hashes
+        # filename -> (content hash, code hash) computed in this build
+        self.__computed_code_hashes = {}
+        try:
+            with open(path, 'r') as _:
+                self.__fingerprints = json.load(_)
+        except (IOError, ValueError):
+            self.__fingerprints = {}
+
+    def has_changed(self, filename):
+        """
+        Whether the contents of `filename` differ from its record.
+        """
+        fingerprint = self.__fingerprints.get(filename)
+        return fingerprint is None or hash_file(filename) != fingerprint['hash']
+
+    def is_stale(self, filename, changed):
+        """
+        Whether `filename` needs scanning again, `changed` being the
+        files has_changed() is true for.
+        """
+        fingerprint = self.__fingerprints.get(filename)
+        if fingerprint is None or filename in changed:
+            return True
+
+        return self.__includes_changed(fingerprint, changed)
+
+    def changed_in_comments_only(self, filename, changed):
+        """
+        Whether `filename` is stale only because of edits to the
+        gtk-doc blocks outside of its declarations, its symbols can then
+        be kept as they are.
+        """
+        fingerprint = self.__fingerprints.get(filename)
+        if fingerprint is None or fingerprint.get('code_hash') is None:
+            return False
+
+        if self.__includes_changed(fingerprint, changed):
+            return False
+
+        return self.__get_code_hash(filename) == fingerprint['code_hash']
+
+    def __includes_changed(self, fingerprint, changed):
+        for header, digest in fingerprint['includes'].items():
+            if header in changed:
+                return True
+            # Rescanned since, with different contents
+            record = self.__fingerprints.get(header)
+            if record is None:
+                if hash_file(header) != digest:
+                    return True
+            elif record['hash'] != digest:
+                return True
+
+        return False
+
+    def __get_code_hash(self, filename):
+        digest = hash_file(filename)
+        computed = self.__computed_code_hashes.get(filename)
+        if computed is None or computed[0] != digest:
+            computed = (digest, hash_code(filename))
+            self.__computed_code_hashes[filename] = computed
+        return computed[1]
+
+    def is_header_guarded(self, filename):
+        fingerprint = self.__fingerprints.get(filename)
+        return bool(fingerprint and fingerprint.get('header_guarded'))
+
+    def record(self, filename, includes=None, header_guarded=None):
+        """
+        Records the current state of `filename` and of the project
+        headers it includes. `includes` and `header_guarded` are taken
+        from the previous record when None.
+        """
+        digest = hash_file(filename)
+        previous = self.__fingerprints.pop(filename, None) or {}
+        if digest is None:
+            return
+
+        if includes is None:
+            includes = previous.get('includes', ())
+        if header_guarded is None:
+            header_guarded = previous.get('header_guarded', False)
+
+        if previous.get('hash') == digest:
+            code_hash = previous.get('code_hash')
+        elif self.__code_hashes:
+            code_hash = self.__get_code_hash(filename)
+        else:
+            code_hash = None
+
+        self.__fingerprints[filename] = {
+            'hash': digest,
+            'code_hash': code_hash,
+            'header_guarded': header_guarded,
+            'includes': {header: hash_file(header) for header in includes}}
+
+    def save(self):
+        dirname = os.path.dirname(self.__path)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+
+        tmp_path = '%s.%d.tmp' % (self.__path, os.getpid())
+        with open(tmp_path, 'w') as _:
+            json.dump(self.__fingerprints, _)
+        os.rename(tmp_path, self.__path)
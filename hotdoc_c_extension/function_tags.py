@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Index of the function definitions of C source files, built with the
+comment scanner rather than clang.
+"""
+
+import os
+import json
+
+from .c_comment_scanner.c_comment_scanner import extract_function_tags
+from .utils.encoding import read_scannable_source
+from .utils.hashing import hash_file, hash_strings
+
+
+class FunctionTagIndex(object):
+    """
+    Maps the names of the functions defined at the top level of a source
+    file to the lines they span, ctags-style.
+
+    This only looks at tokens, so definitions generated by macros are
+    missed, and both branches of an #if are seen, the first definition
+    of a name wins. Callers are expected to fall back to clang when a
+    name can't be found.
+
+    Results are stored in `cache_dir`, one entry per file, along with
+    the hash of the contents they were computed from: an edit of the
+    file replaces its entry.
+    """
+    def __init__(self, cache_dir):
+        self.__cache_dir = cache_dir
+        # path -> (digest, {name: (start, end)})
+        self.__files = {}
+
+    def __path(self, path):
+        return os.path.join(self.__cache_dir, hash_strings(path) + '.json')
+
+    def __load(self, path, digest):
+        try:
+            with open(self.__path(path), 'r') as _:
+                stored = json.load(_)
+            if stored['digest'] != digest:
+                return None
+            return {name: tuple(extent)
+                    for name, extent in stored['tags'].items()}
+        except (IOError, ValueError, KeyError, TypeError):
+            return None
+
+    def __save(self, path, digest, tags):
+        if not os.path.exists(self.__cache_dir):
+            os.makedirs(self.__cache_dir)
+        cache_path = self.__path(path)
+        tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        with open(tmp_path, 'w') as _:
+            json.dump({'digest': digest, 'tags': tags}, _)
+        os.rename(tmp_path, cache_path)
+
+    def index(self, path):
+        """
+        Returns the {name: (start_line, end_line)} map of `path`, or
+        None if it can not be read.
+        """
+        digest = hash_file(path)
+        if digest is None:
+            return None
+
+        cached = self.__files.get(path)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+
+        tags = self.__load(path, digest)
+        if tags is None:
+            data, _ = read_scannable_source(path)
+            tags = {}
+            for name, start, end in extract_function_tags(data):
+                tags.setdefault(name, (start, end))
+            self.__save(path, digest, tags)
+
+        self.__files[path] = (digest, tags)
+        return tags
+
+    def index_all(self, paths):
+        for path in paths:
+            self.index(path)
+
+    def lookup(self, path, name):
+        """
+        Returns the (start_line, end_line) extent of the definition of
+        `name` in `path`, or None.
+        """
+        tags = self.index(path)
+        if not tags:
+            return None
+        return tags.get(name)
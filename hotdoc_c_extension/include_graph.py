@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cheap include graph of C sources, built by looking for #include
+directives in the text of the files instead of preprocessing them.
+
+Conditional inclusion is not evaluated, the graph can thus contain edges
+the compiler would not follow, it is only meant to guide decisions that
+stay correct when it is inaccurate.
+"""
+
+import os
+import re
+
+INCLUDE_RE = re.compile(br'^[ \t]*#[ \t]*include[ \t]*([<"])([^>"\n]+)[>"]',
+                        re.MULTILINE)
+
+
+def include_dirs_from_args(args):
+    """
+    Returns the include directories set in a list of compiler arguments.
+    """
+    dirs = []
+    for i, arg in enumerate(args):
+        for flag in ('-I', '-isystem', '-iquote', '-idirafter'):
+            if arg == flag and i + 1 < len(args):
+                dirs.append(args[i + 1])
+                break
+            elif arg.startswith(flag) and arg != flag:
+                dirs.append(arg[len(flag):])
+                break
+    return dirs
+
+
+def find_includes(filename):
+    """
+    Returns the (quoted, name) pairs of the files `filename` includes,
+    quoted being True for #include "name".
+    """
+    try:
+        with open(filename, 'rb') as _:
+            contents = _.read()
+    except IOError:
+        return []
+
+    return [(quote == b'"', name.decode('utf-8', 'replace').strip())
+            for quote, name in INCLUDE_RE.findall(contents)]
+
+
+def resolve_include(name, quoted, including_dir, include_dirs):
+    """
+    Returns the absolute path `name` refers to, or None if it is not
+    found in `include_dirs`.
+    """
+    if os.path.isabs(name):
+        return name if os.path.exists(name) else None
+
+    dirs = include_dirs
+    if quoted:
+        dirs = [including_dir] + include_dirs
+
+    for dir_ in dirs:
+        path = os.path.join(dir_, name)
+        if os.path.exists(path):
+            return os.path.abspath(path)
+
+    return None
+
+
+def _is_under(path, roots):
+    for root in roots:
+        if path.startswith(root):
+            return True
+    return False
+
+
+class IncludeGraph(object):
+    """
+    `directives` may be shared between graphs built with different
+    include directories, so that each file is only read once.
+    """
+    def __init__(self, include_dirs, directives=None):
+        self.__include_dirs = include_dirs
+        # filename -> list of resolved includes
+        self.edges = {}
+        # filename -> find_includes(filename)
+        self.directives = directives if directives is not None else {}
+
+    def add_file(self, filename):
+        if filename in self.edges:
+            return self.edges[filename]
+
+        directives = self.directives.get(filename)
+        if directives is None:
+            directives = find_includes(filename)
+            self.directives[filename] = directives
+
+        including_dir = os.path.dirname(filename)
+        includes = []
+        for quoted, name in directives:
+            path = resolve_include(name, quoted, including_dir,
+                                   self.__include_dirs)
+            if path is not None and path not in includes:
+                includes.append(path)
+
+        self.edges[filename] = includes
+        return includes
+
+    def closure(self, filename, restrict_to=None, roots=None):
+        """
+        Returns the files `filename` includes, directly or not, in the
+        order they are first reached. Only files in `restrict_to`, or
+        in one of the directories of `roots`, if provided, are followed.
+        """
+        if roots is not None:
+            roots = tuple(os.path.join(root, '') for root in roots)
+
+        seen = set([filename])
+        result = []
+        stack = [filename]
+        while stack:
+            current = stack.pop(0)
+            for include in self.add_file(current):
+                if include in seen:
+                    continue
+                seen.add(include)
+                if restrict_to is not None and include not in restrict_to:
+                    continue
+                if roots is not None and not _is_under(include, roots):
+                    continue
+                result.append(include)
+                stack.append(include)
+        return result
+
+
+def plan_translation_units(filenames, include_dirs, directives=None):
+    """
+    Splits `filenames` in the files to parse as translation units so
+    that, according to the include graph, the others get included by
+    one of them, and the remaining files.
+
+    The translation units are picked greedily, the one including the
+    most files not covered yet first, in the original order on ties.
+    `directives` is passed to IncludeGraph.
+    """
+    graph = IncludeGraph(include_dirs, directives)
+    candidates = set(filenames)
+    covers = {}
+    for filename in filenames:
+        covers[filename] = set(graph.closure(filename,
+                                             restrict_to=candidates))
+        covers[filename].add(filename)
+
+    uncovered = set(filenames)
+    planned = []
+    while uncovered:
+        best = None
+        best_count = 0
+        for filename in filenames:
+            if filename not in uncovered:
+                continue
+            count = len(covers[filename] & uncovered)
+            if count > best_count:
+                best, best_count = filename, count
+        planned.append(best)
+        uncovered -= covers[best]
+
+    planned_set = set(planned)
+    return planned, [f for f in filenames if f not in planned_set]
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Persistent cache of the code snippets rendered for inclusions.
+"""
+
+import os
+import json
+
+from .utils.hashing import hash_file, hash_strings
+
+
+class InclusionCache(object):
+    """
+    Stores the text rendered for the inclusions of symbols from each
+    source file, keyed by the name of the symbol and the included line
+    ranges.
+
+    Each source has one entry, holding the hash of the contents it was
+    rendered from: an edit of the file replaces the inclusions stored
+    for it rather than adding to them.
+    """
+    def __init__(self, cache_dir):
+        self.__cache_dir = cache_dir
+        # filename -> (digest, {key: text})
+        self.__files = {}
+
+    def __path(self, filename):
+        return os.path.join(self.__cache_dir,
+                            hash_strings(filename) + '.json')
+
+    def __get_inclusions(self, filename):
+        digest = hash_file(filename)
+        if digest is None:
+            return None
+
+        cached = self.__files.get(filename)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+
+        inclusions = {}
+        try:
+            with open(self.__path(filename), 'r') as _:
+                stored = json.load(_)
+            if stored['digest'] == digest:
+                inclusions = stored['inclusions']
+        except (IOError, ValueError, KeyError, TypeError):
+            pass
+
+        self.__files[filename] = (digest, inclusions)
+        return inclusions
+
+    @staticmethod
+    def __key(symbol_name, line_ranges):
+        return hash_strings(symbol_name, repr(list(line_ranges)))
+
+    def load(self, filename, symbol_name, line_ranges):
+        """
+        Returns the text stored for this inclusion, or None.
+        """
+        inclusions = self.__get_inclusions(filename)
+        if inclusions is None:
+            return None
+        return inclusions.get(self.__key(symbol_name, line_ranges))
+
+    def save(self, filename, symbol_name, line_ranges, text):
+        inclusions = self.__get_inclusions(filename)
+        if inclusions is None:
+            return
+        inclusions[self.__key(symbol_name, line_ranges)] = text
+
+        if not os.path.exists(self.__cache_dir):
+            os.makedirs(self.__cache_dir)
+        path = self.__path(filename)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as _:
+            json.dump({'digest': self.__files[filename][0],
+                       'inclusions': inclusions}, _)
+        os.rename(tmp_path, path)
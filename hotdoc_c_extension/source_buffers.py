@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Read-only access to the lines of the scanned sources.
+"""
+
+import os
+import mmap
+from array import array
+from collections import OrderedDict
+
+
+class _SourceBuffer(object):
+    def __init__(self, path, stamp):
+        self.stamp = stamp
+        with open(path, 'rb') as _:
+            try:
+                self.data = mmap.mmap(_.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file, can't be mapped
+                self.data = b''
+
+        # Offset of the start of each line, plus the end of the buffer
+        offsets = array('L', [0])
+        find = self.data.find
+        pos = find(b'\n')
+        while pos != -1:
+            offsets.append(pos + 1)
+            pos = find(b'\n', pos + 1)
+        if offsets[-1] != len(self.data):
+            offsets.append(len(self.data))
+        self.offsets = offsets
+        self.view = memoryview(self.data)
+
+    @property
+    def n_lines(self):
+        return len(self.offsets) - 1
+
+
+class SourceBuffers(object):
+    """
+    Maps each source file once and serves its lines through a line offset
+    index; only the `max_files` most recently used files are kept mapped.
+    """
+    def __init__(self, max_files=64):
+        self.__max_files = max_files
+        self.__buffers = OrderedDict()
+
+    def __get_buffer(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.__buffers.pop(path, None)
+            return None
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        buf = self.__buffers.pop(path, None)
+        if buf is None or buf.stamp != stamp:
+            try:
+                buf = _SourceBuffer(path, stamp)
+            except (IOError, OSError):
+                return None
+
+        # Evicted buffers get unmapped once the last view on them is gone
+        self.__buffers[path] = buf
+        while len(self.__buffers) > self.__max_files:
+            self.__buffers.popitem(last=False)
+
+        return buf
+
+    def get_slice(self, path, start, end):
+        """
+        Returns a memoryview on lines `start` to `end` (1-based, end
+        excluded) of `path`, trailing newline included, or None if the
+        file can not be read.
+        """
+        buf = self.__get_buffer(path)
+        if buf is None:
+            return None
+
+        start = min(max(start, 1), buf.n_lines + 1)
+        end = min(max(end, start), buf.n_lines + 1)
+        return buf.view[buf.offsets[start - 1]:buf.offsets[end - 1]]
+
+    def get_lines(self, path, start, end):
+        """
+        Returns the lines `start` to `end` (1-based, end excluded) of
+        `path`, with trailing whitespace stripped. Lines past the end of
+        the file are returned empty, as linecache would.
+        """
+        view = self.get_slice(path, start, end)
+        if view is None:
+            return [''] * max(end - start, 0)
+
+        lines = [''] * min(max(1 - start, 0), end - start)
+        lines.extend(l.rstrip() for l in
+                     view.tobytes().decode('utf-8', 'replace').split('\n'))
+        if len(lines) > end - start:
+            lines.pop()
+        lines.extend([''] * (end - start - len(lines)))
+        return lines
+
+    def get_text(self, path, start, end):
+        """
+        Returns the lines `start` to `end` (1-based, end excluded) of
+        `path` joined by newlines, as "\n".join() on the lines of the
+        file would give them, or None if the file can not be read.
+        """
+        buf = self.__get_buffer(path)
+        if buf is None:
+            return None
+
+        start = min(max(start, 1), buf.n_lines + 1)
+        end = min(max(end, start), buf.n_lines + 2)
+        text = buf.view[buf.offsets[start - 1]:
+                        buf.offsets[min(end, buf.n_lines + 1) - 1]]
+        text = text.tobytes().decode('utf-8', 'replace')
+        text = text.replace('\r\n', '\n')
+        # The last line of a file ending with a newline is an empty one
+        if end <= buf.n_lines + 1 and text.endswith('\n'):
+            text = text[:-1]
+        return text
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Picklable stand-ins for symbols created in scanner worker processes.
+
+Workers can't reach the doc database, so they hand a SymbolRecorder to the
+scanner in place of the extension; the parent later replays the recorded
+calls, in order, against the real extension.
+"""
+
+
+class SymbolRecord(object):
+    """
+    What a worker gets back from SymbolRecorder.get_or_create_symbol.
+    Attributes set on it after creation (enum_value for example) are
+    remembered and applied to the real symbol on replay.
+    """
+    _own_attributes = ('index', 'type_', 'kwargs', 'attributes')
+
+    def __init__(self, index, type_, kwargs):
+        object.__setattr__(self, 'index', index)
+        object.__setattr__(self, 'type_', type_)
+        object.__setattr__(self, 'kwargs', kwargs)
+        object.__setattr__(self, 'attributes', {})
+
+    def __setattr__(self, name, value):
+        if name in SymbolRecord._own_attributes:
+            object.__setattr__(self, name, value)
+        else:
+            self.attributes[name] = value
+
+    @property
+    def unique_name(self):
+        return self.kwargs.get('unique_name') or self.kwargs.get('display_name')
+
+
+class SymbolUnit(object):
+    """
+    The records created while handling one top-level cursor, the last
+    record (if any) being the symbol the scanner registered.
+    """
+    def __init__(self, key, records, registered):
+        self.key = key
+        self.records = records
+        self.registered = registered
+
+
+class SymbolRecorder(object):
+    def __init__(self):
+        self.__pending = []
+        self.units = []
+
+    def get_or_create_symbol(self, type_, **kwargs):
+        record = SymbolRecord(len(self.__pending), type_, kwargs)
+        self.__pending.append(record)
+        return record
+
+    def end_unit(self, key, sym):
+        if not self.__pending:
+            return
+        self.units.append(SymbolUnit(key, self.__pending, sym is not None))
+        self.__pending = []
+
+    def pop_units(self):
+        units = self.units
+        self.units = []
+        self.__pending = []
+        return units
+
+
+def _resolve(value, created):
+    if isinstance(value, SymbolRecord):
+        return created[value.index]
+    elif isinstance(value, list):
+        return [_resolve(v, created) for v in value]
+    return value
+
+
+def replay_unit(unit, doc_db):
+    created = []
+    for record in unit.records:
+        kwargs = {key: _resolve(value, created)
+                  for key, value in record.kwargs.items()}
+        sym = doc_db.get_or_create_symbol(record.type_, **kwargs)
+        for name, value in record.attributes.items():
+            setattr(sym, name, value)
+        created.append(sym)
+
+    if unit.registered:
+        return created[-1]
+    return None
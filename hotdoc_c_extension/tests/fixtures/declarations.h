@@ -0,0 +1,51 @@
+#ifndef DECLARATIONS_H
+#define DECLARATIONS_H
+
+typedef int gint;
+typedef char gchar;
+
+#define DECLARE_TYPE(ModuleObjName, module_obj_name)                  \
+  typedef struct _##ModuleObjName ModuleObjName;                      \
+  typedef struct { gint parent; } ModuleObjName##Class;               \
+  static inline ModuleObjName *                                       \
+  module_obj_name##_cast (void *ptr) { return (ModuleObjName *) ptr; }
+
+DECLARE_TYPE (TestObject, test_object)
+
+struct _TestObject {
+  gint public_field;
+  /*< private >*/
+  gint private_field;
+  /*< public >*/
+  const gchar *name;
+};
+
+typedef enum {
+  TEST_RED,
+  TEST_GREEN = 5,
+} TestColor;
+
+enum TestFlags { TEST_FLAG_A = 1 << 0, TEST_FLAG_B = 1 << 1 };
+
+struct TestPair { gint a; struct TestInner { gint c; } inner; };
+
+typedef void (*TestCallback) (TestObject *obj, const gchar *msg, gint n);
+typedef gint TestInt;
+
+extern const gchar *test_version;
+
+TestObject *test_object_new (const gchar *name, TestInt count);
+void test_object_set_callback (TestObject *obj, TestCallback cb,
+                               volatile gint * const *data);
+TestColor test_object_get_color (const TestObject *obj,
+                                 enum TestFlags flags,
+                                 struct TestPair *pair);
+
+static inline gint
+test_object_get_field (TestObject *obj)
+{
+  gint local = 3;
+  return local + obj->public_field;
+}
+
+#endif
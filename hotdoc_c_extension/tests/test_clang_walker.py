@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import unittest
+from unittest import mock
+
+from hotdoc_c_extension import c_extension
+from hotdoc_c_extension.symbol_records import SymbolRecord
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures',
+                       'declarations.h')
+
+
+class _Database(object):
+    def get_comment(self, name):
+        return None
+
+
+class _DocDatabase(object):
+    def __init__(self):
+        self.records = []
+
+    def get_or_create_symbol(self, type_, **kwargs):
+        record = SymbolRecord(len(self.records), type_, kwargs)
+        self.records.append(record)
+        return record
+
+
+class _App(object):
+    database = _Database()
+    incremental = False
+
+
+class _Project(object):
+    include_paths = []
+
+
+def _render(value):
+    if isinstance(value, SymbolRecord):
+        return (value.type_.__name__, _render(value.kwargs),
+                _render(value.attributes))
+    elif isinstance(value, (list, tuple)):
+        return [_render(v) for v in value]
+    elif isinstance(value, dict):
+        return sorted((k, _render(v)) for k, v in value.items())
+    elif hasattr(value, '__dict__') and not isinstance(value, type):
+        return (type(value).__name__,
+                sorted((k, _render(v)) for k, v in vars(value).items()
+                       if not k.startswith('_')))
+    return repr(value)
+
+
+def _scan(fixture):
+    doc_db = _DocDatabase()
+    scanner = c_extension.ClangScanner(_App(), _Project(), doc_db,
+                                       c_extension.ScannerSession(None))
+    scanner.scan([fixture], [], False, True, ['*.h'])
+    return sorted(scanner.symbols), [_render(r) for r in doc_db.records]
+
+
+class TestClangWalker(unittest.TestCase):
+    def setUp(self):
+        # Also loads libclang, so that the walker can be checked
+        c_extension.ClangScanner(_App(), _Project(), _DocDatabase(),
+                                 c_extension.ScannerSession(None))
+        if c_extension.get_native_walker() is None:
+            self.skipTest('clang_walker is not built for this libclang')
+
+    def test_same_symbols_as_tokens(self):
+        walked = _scan(FIXTURE)
+        with mock.patch.object(c_extension, 'get_native_walker',
+                               return_value=None):
+            tokenized = _scan(FIXTURE)
+
+        self.assertIn('test_object_new', walked[0])
+        self.assertIn('_TestObject', walked[0])
+        # Declared by a macro expansion
+        self.assertIn('test_object_cast', walked[0])
+        self.assertEqual(walked, tokenized)
+
+
+class TestFieldDelimiters(unittest.TestCase):
+    def test_private_fields_hidden(self):
+        with mock.patch.object(c_extension, 'get_native_walker',
+                               return_value=None):
+            doc_db = _DocDatabase()
+            scanner = c_extension.ClangScanner(
+                _App(), _Project(), doc_db, c_extension.ScannerSession(None))
+            scanner.scan([FIXTURE], [], False, True, ['*.h'])
+
+        struct = [r for r in doc_db.records
+                  if r.kwargs.get('display_name') == '_TestObject'
+                  and 'members' in r.kwargs][0]
+        # With a public delimiter, the fields before any delimiter are
+        # private too
+        self.assertEqual([m.kwargs['member_name']
+                          for m in struct.kwargs['members']], ['name'])
+        self.assertEqual(struct.kwargs['raw_text'],
+                         'struct _TestObject {\n  const gchar *name;\n};')
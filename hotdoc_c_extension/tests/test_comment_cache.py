@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from hotdoc.core.comment import Comment
+
+from hotdoc_c_extension import c_extension
+from hotdoc_c_extension.c_extension import extract_file_comments
+from hotdoc_c_extension.comment_cache import CommentCache
+
+CONTENTS = '/**\n * f:\n * @a: A parameter\n */\nint f (int a);\n'
+
+
+class _CommentParser(object):
+    def __init__(self):
+        self.n_parsed = 0
+
+    def parse_comment(self, comment, filename, lineno, endlineno,
+                      include_paths):
+        self.n_parsed += 1
+        c_extension.Logger.warn('gtk-doc-bad-syntax', 'Bad syntax',
+                                filename=filename, lineno=lineno + 1)
+        param = Comment(name='a', filename=filename, lineno=lineno + 2,
+                        endlineno=lineno + 2)
+        return Comment(name='f', filename=filename, lineno=lineno,
+                       endlineno=endlineno, params={'a': param})
+
+
+class TestCommentCache(unittest.TestCase):
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.__dir, 'comments')
+        self.source = os.path.join(self.__dir, 'source.h')
+        self.parser = _CommentParser()
+        patch = mock.patch.object(c_extension.Logger, 'warn')
+        self.warn = patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir)
+
+    def extract(self, contents, cache=True):
+        with open(self.source, 'w') as _:
+            _.write(contents)
+        comment_cache = CommentCache(self.cache_dir) if cache else None
+        items = extract_file_comments(self.parser, self.source, [],
+                                      comment_cache)
+        return [item for kind, item in items if kind == 'comment']
+
+    def test_moved_comment(self):
+        block, = self.extract(CONTENTS)
+        lineno = block.lineno
+        self.assertEqual(self.parser.n_parsed, 1)
+        self.assertEqual(self.warn.call_count, 1)
+
+        block, = self.extract('\n\n' + CONTENTS)
+        self.assertEqual(self.parser.n_parsed, 1)
+        self.assertEqual(block.lineno, lineno + 2)
+        self.assertEqual(block.params['a'].lineno, lineno + 4)
+        # Emitted again, where the comment now is
+        self.assertEqual(self.warn.call_count, 2)
+        self.assertEqual(self.warn.call_args[1]['lineno'], lineno + 3)
+
+    def test_no_cache(self):
+        with mock.patch.object(CommentCache, 'pack') as pack:
+            self.extract(CONTENTS, cache=False)
+        self.assertFalse(pack.called)
+
+    def test_unloadable_entry(self):
+        self.extract(CONTENTS)
+        with mock.patch('pickle.loads', side_effect=AttributeError):
+            block, = self.extract(CONTENTS)
+        self.assertEqual(self.parser.n_parsed, 2)
+        self.assertEqual(block.name, 'f')
+
+    def test_other_versions_removed(self):
+        os.makedirs(os.path.join(self.cache_dir, 'old-version'))
+        with open(os.path.join(self.cache_dir, 'old.pickle'), 'w'):
+            pass
+        self.extract(CONTENTS)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from hotdoc_c_extension.compile_commands import clean_arguments
+
+DIRECTORY = '/build/sub'
+FILENAME = '/build/src/foo.c'
+
+
+def clean(*args):
+    return clean_arguments(['cc'] + list(args), DIRECTORY, FILENAME)
+
+
+class TestCleanArguments(unittest.TestCase):
+    def test_defines(self):
+        self.assertEqual(clean('-DFOO', '-D', 'BAR=1', '-UBAZ', '-U', 'QUX'),
+                         ['-DFOO', '-DBAR=1', '-UBAZ', '-UQUX'])
+
+    def test_relative_paths(self):
+        self.assertEqual(
+            clean('-I../include', '-I', 'gen', '-isystem', '/usr/include/x',
+                  '-include', 'config.h', '--sysroot', '..'),
+            ['-I/build/include', '-I/build/sub/gen',
+             '-isystem/usr/include/x', '-include', '/build/sub/config.h',
+             '--sysroot', '/build'])
+
+    def test_source_and_output_dropped(self):
+        self.assertEqual(
+            clean('-c', '../src/foo.c', '-o', 'foo.o', '-MD', '-MF',
+                  'foo.d', '-MT', 'foo.o', '-x', 'c', '-DA'),
+            ['-DA'])
+
+    def test_language_flags_kept(self):
+        flags = ['-std=gnu11', '-m32', '-pthread', '-ansi', '--target=arm',
+                 '-fno-builtin', '-fms-extensions', '-fblocks',
+                 '-fsigned-char', '-fshort-enums', '-fno-builtin-memcpy',
+                 '-fpack-struct=4']
+        self.assertEqual(clean(*flags), flags)
+
+    def test_other_flags_dropped(self):
+        self.assertEqual(
+            clean('-O2', '-g', '-Wall', '-Werror=format', '-fPIC',
+                  '-fplugin=/x.so', '-fmax-errors=3',
+                  '-ffile-prefix-map=/a=/b', '-fdiagnostics-color=always',
+                  '-fstack-protector-strong', '-pipe'),
+            [])
+
+
+if __name__ == '__main__':
+    unittest.main()
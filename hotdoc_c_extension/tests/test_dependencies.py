@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from hotdoc_c_extension.c_extension import ClangScanner
+from hotdoc_c_extension.symbol_records import SymbolRecorder
+
+HEADERS = {
+    'types.h': '#ifndef TYPES_H\n#define TYPES_H\n'
+               'typedef int MyInt;\n#endif\n',
+    'first.h': '#include "types.h"\nMyInt first (void);\n',
+    'second.h': '#include "types.h"\nMyInt second (void);\n',
+    'all.h': '#include "first.h"\n#include "second.h"\n',
+}
+
+
+class TestDependencies(unittest.TestCase):
+    def setUp(self):
+        self.__dir = os.path.realpath(tempfile.mkdtemp())
+        self.paths = {}
+        for name, contents in HEADERS.items():
+            self.paths[name] = os.path.join(self.__dir, name)
+            with open(self.paths[name], 'w') as _:
+                _.write(contents)
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir)
+
+    def test_header_included_twice(self):
+        filenames = [self.paths[name]
+                     for name in ('types.h', 'first.h', 'second.h', 'all.h')]
+        # Worker processes scan with the same stand-ins
+        scanner = ClangScanner(None, None, SymbolRecorder())
+        scanner.scan(filenames, [], False, True, ['*.h'],
+                     all_sources=filenames)
+
+        # all.h covers the others, and types.h is only entered from
+        # first.h in its translation unit
+        dependencies = scanner.dependencies
+        self.assertEqual(dependencies[self.paths['first.h']],
+                         [self.paths['types.h']])
+        self.assertEqual(dependencies[self.paths['second.h']],
+                         [self.paths['types.h']])
+        self.assertEqual(dependencies[self.paths['all.h']],
+                         sorted(self.paths[name] for name in
+                                ('types.h', 'first.h', 'second.h')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from hotdoc_c_extension import fingerprints
+from hotdoc_c_extension.fingerprints import FingerprintStore
+
+
+class TestFingerprintStore(unittest.TestCase):
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.__dir, 'cache', 'fingerprints.json')
+        self.header = self.write('header.h', 'int a;\n')
+        self.source = self.write('source.h',
+                                 '#include "header.h"\nint b;\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir)
+
+    def write(self, name, contents):
+        path = os.path.join(self.__dir, name)
+        with open(path, 'w') as _:
+            _.write(contents)
+        # hash_file caches on (mtime, size)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        return path
+
+    def record_all(self, store):
+        store.record(self.header, ())
+        store.record(self.source, [self.header])
+        store.save()
+
+    def changed(self, store):
+        return set(f for f in (self.header, self.source)
+                   if store.has_changed(f))
+
+    def test_unknown_is_stale(self):
+        store = FingerprintStore(self.path)
+        self.assertTrue(store.is_stale(self.source, self.changed(store)))
+
+    def test_unchanged(self):
+        self.record_all(FingerprintStore(self.path))
+        store = FingerprintStore(self.path)
+        changed = self.changed(store)
+        self.assertEqual(changed, set())
+        self.assertFalse(store.is_stale(self.header, changed))
+        self.assertFalse(store.is_stale(self.source, changed))
+
+    def test_header_change(self):
+        self.record_all(FingerprintStore(self.path))
+        self.write('header.h', 'int a;\nint c;\n')
+        store = FingerprintStore(self.path)
+        changed = self.changed(store)
+        self.assertEqual(changed, set([self.header]))
+        self.assertTrue(store.is_stale(self.header, changed))
+        self.assertTrue(store.is_stale(self.source, changed))
+
+    def test_header_rescanned_alone(self):
+        self.record_all(FingerprintStore(self.path))
+        self.write('header.h', 'int a;\nint c;\n')
+        store = FingerprintStore(self.path)
+        store.record(self.header, ())
+        store.save()
+
+        store = FingerprintStore(self.path)
+        changed = self.changed(store)
+        self.assertEqual(changed, set())
+        self.assertTrue(store.is_stale(self.source, changed))
+
+    def assert_comments_only(self, before, after, expected):
+        self.write('header.h', before)
+        self.record_all(FingerprintStore(self.path))
+        self.write('header.h', after)
+        store = FingerprintStore(self.path)
+        changed = self.changed(store)
+        self.assertEqual(store.changed_in_comments_only(self.header, changed),
+                         expected)
+        self.assertFalse(store.changed_in_comments_only(self.source, changed))
+
+    def test_comments_only(self):
+        self.assert_comments_only(
+            '/**\n * a:\n *\n * A variable.\n */\nint a;\n',
+            '/**\n * a:\n *\n * The variable.\n */\nint a;\n', True)
+
+    def test_comment_lines_count(self):
+        self.assert_comments_only('/** a: A variable. */\nint a;\n',
+                                  '/**\n * a: A variable.\n */\nint a;\n',
+                                  False)
+
+    def test_delimiter_change(self):
+        self.assert_comments_only(
+            'struct S {\n  int a;\n  /*< private >*/\n  int b;\n};\n',
+            'struct S {\n  int a;\n  /*< public >*/\n  int b;\n};\n',
+            False)
+
+    def test_comment_in_declaration(self):
+        self.assert_comments_only(
+            'enum E {\n  /** A value */\n  E_A\n};\n',
+            'enum E {\n  /** The value */\n  E_A\n};\n', False)
+        self.assert_comments_only(
+            'char *s = "{";\n/** A */\nint a;\n',
+            'char *s = "{";\n/** B */\nint a;\n', True)
+
+    def test_inline_comment(self):
+        self.assert_comments_only('int a; /** A variable */\n',
+                                  'int a; /** The variable */\n', False)
+
+    def test_code_hashes_of_changed_files_only(self):
+        with mock.patch.object(fingerprints, 'hash_code',
+                               wraps=fingerprints.hash_code) as hash_code:
+            self.record_all(FingerprintStore(self.path, code_hashes=False))
+            self.assertEqual(hash_code.call_count, 0)
+
+            self.write('header.h', 'int a;\nint c;\n')
+            store = FingerprintStore(self.path)
+            changed = self.changed(store)
+            self.assertFalse(store.changed_in_comments_only(self.header,
+                                                            changed))
+            self.assertEqual(hash_code.call_count, 0)
+            self.record_all(store)
+            hash_code.assert_called_once_with(self.header)
+
+
+if __name__ == '__main__':
+    unittest.main()
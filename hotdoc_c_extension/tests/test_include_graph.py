@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from hotdoc_c_extension.include_graph import (IncludeGraph,
+                                              plan_translation_units)
+
+
+class TestPlanTranslationUnits(unittest.TestCase):
+    def setUp(self):
+        self.__dir = os.path.realpath(tempfile.mkdtemp())
+        self.include_dir = os.path.join(self.__dir, 'include')
+        os.makedirs(os.path.join(self.include_dir, 'proj'))
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir)
+
+    def write(self, name, *includes):
+        path = os.path.join(self.__dir, name)
+        with open(path, 'w') as _:
+            for include in includes:
+                _.write('#include %s\n' % include)
+            _.write('int x;\n')
+        return path
+
+    def test_greedy_cover(self):
+        types = self.write('include/proj/types.h')
+        util = self.write('include/proj/util.h', '"types.h"')
+        api = self.write('include/proj/api.h', '<proj/types.h>',
+                         '"util.h"')
+        other = self.write('include/proj/other.h', '<proj/types.h>')
+        filenames = [types, util, other, api]
+        planned, covered = plan_translation_units(filenames,
+                                                  [self.include_dir])
+        # api.h covers three files, other.h is left to cover
+        self.assertEqual(planned, [api, other])
+        self.assertEqual(covered, [types, util])
+
+    def test_ties_keep_order(self):
+        types = self.write('include/proj/types.h')
+        first = self.write('include/proj/first.h', '"types.h"')
+        second = self.write('include/proj/second.h', '"types.h"')
+        planned, covered = plan_translation_units([types, first, second],
+                                                  [self.include_dir])
+        self.assertEqual(planned, [first, second])
+        self.assertEqual(covered, [types])
+
+    def test_unreachable_header(self):
+        types = self.write('include/proj/types.h')
+        lone = self.write('include/proj/lone.h', '<stdio.h>')
+        source = self.write('source.c', '<proj/types.h>')
+        planned, covered = plan_translation_units([types, lone, source],
+                                                  [self.include_dir])
+        self.assertEqual(planned, [source, lone])
+        self.assertEqual(covered, [types])
+
+    def test_closure(self):
+        types = self.write('include/proj/types.h')
+        api = self.write('include/proj/api.h', '"types.h"', '"missing.h"')
+        source = self.write('source.c', '<proj/api.h>', '"source.h"')
+        private = self.write('source.h', '<proj/types.h>')
+        graph = IncludeGraph([self.include_dir])
+        self.assertEqual(graph.closure(source), [api, private, types])
+        self.assertEqual(graph.closure(source, restrict_to=set([api])),
+                         [api])
+        self.assertEqual(graph.closure(source, roots=[self.include_dir]),
+                         [api, types])
+
+
+if __name__ == '__main__':
+    unittest.main()
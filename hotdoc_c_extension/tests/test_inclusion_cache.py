@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from hotdoc_c_extension.inclusion_cache import InclusionCache
+
+
+class TestInclusionCache(unittest.TestCase):
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.__dir, 'inclusions')
+        self.source = os.path.join(self.__dir, 'source.c')
+        self.n_writes = 1
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir)
+
+    def write(self, contents):
+        with open(self.source, 'w') as _:
+            _.write(contents)
+        # hash_file caches on (mtime, size)
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 1000000 * self.n_writes))
+        self.n_writes += 1
+
+    def test_load_saved(self):
+        self.write('int f (void) { return 0; }\n')
+        InclusionCache(self.cache_dir).save(self.source, 'f', [(1, -1)],
+                                            'int f (void)\r\n{ é }')
+        cache = InclusionCache(self.cache_dir)
+        self.assertEqual(cache.load(self.source, 'f', [(1, -1)]),
+                         'int f (void)\r\n{ é }')
+        self.assertIsNone(cache.load(self.source, 'f', [(1, 2)]))
+        self.assertIsNone(cache.load(self.source, 'g', [(1, -1)]))
+
+    def test_edits_replace_entries(self):
+        for n in range(3):
+            self.write('int f (void) { return %d; }\n' % n)
+            cache = InclusionCache(self.cache_dir)
+            self.assertIsNone(cache.load(self.source, 'f', [(1, -1)]))
+            cache.save(self.source, 'f', [(1, -1)], str(n))
+            cache.save(self.source, 'f', [(1, 2)], str(n))
+            self.assertEqual(cache.load(self.source, 'f', [(1, -1)]), str(n))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from hotdoc_c_extension import source_buffers
+from hotdoc_c_extension.source_buffers import SourceBuffers
+
+CONTENTS = ['', 'one', 'a\nb', 'a\nb\n', '\n\n', 'x\ny\nz\n\n']
+
+
+class TestSourceBuffers(unittest.TestCase):
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp()
+        self.buffers = SourceBuffers()
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir)
+
+    def write(self, name, contents, newline='\n'):
+        path = os.path.join(self.__dir, name)
+        with io.open(path, 'w', newline=newline) as _:
+            _.write(contents)
+        return path
+
+    def assert_text_like_split(self, newline):
+        for n, contents in enumerate(CONTENTS):
+            path = self.write('%d.c' % n, contents, newline)
+            lines = contents.split('\n')
+            for start in range(len(lines) + 2):
+                for end in range(start, len(lines) + 3):
+                    self.assertEqual(
+                        self.buffers.get_text(path, start + 1, end + 1),
+                        '\n'.join(lines[start:end]),
+                        (contents, start, end))
+
+    def test_get_text(self):
+        self.assert_text_like_split('\n')
+
+    def test_get_text_crlf(self):
+        self.assert_text_like_split('\r\n')
+
+    def test_get_lines(self):
+        path = self.write('lines.c', 'a  \r\nb\n\nc')
+        self.assertEqual(self.buffers.get_lines(path, 1, 5),
+                         ['a', 'b', '', 'c'])
+        self.assertEqual(self.buffers.get_lines(path, 0, 3), ['', 'a', 'b'])
+        self.assertEqual(self.buffers.get_lines(path, 4, 7), ['c', '', ''])
+        self.assertEqual(self.buffers.get_lines(path + '.missing', 1, 3),
+                         ['', ''])
+
+    def test_reload_on_change(self):
+        path = self.write('changed.c', 'a\n')
+        self.assertEqual(self.buffers.get_text(path, 1, 2), 'a')
+        path = self.write('changed.c', 'bc\nd\n')
+        self.assertEqual(self.buffers.get_text(path, 1, 3), 'bc\nd')
+
+    def test_eviction(self):
+        buffers = SourceBuffers(max_files=2)
+        paths = [self.write('%d.c' % n, '%d\n' % n) for n in range(3)]
+        with mock.patch.object(source_buffers, '_SourceBuffer',
+                               wraps=source_buffers._SourceBuffer) as load:
+            def get(n):
+                self.assertEqual(buffers.get_text(paths[n], 1, 2), str(n))
+
+            get(0)
+            get(1)
+            get(0)
+            self.assertEqual(load.call_count, 2)
+            # 1 is the least recently used
+            get(2)
+            self.assertEqual(load.call_count, 3)
+            get(0)
+            self.assertEqual(load.call_count, 3)
+            get(1)
+            self.assertEqual(load.call_count, 4)
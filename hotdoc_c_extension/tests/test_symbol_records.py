@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import pickle
+import unittest
+
+from hotdoc_c_extension.symbol_records import SymbolRecorder, replay_unit
+
+
+class Member(object):
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+class Enum(Member):
+    pass
+
+
+class _DocDatabase(object):
+    def __init__(self):
+        self.symbols = []
+
+    def get_or_create_symbol(self, type_, **kwargs):
+        sym = type_(**kwargs)
+        self.symbols.append(sym)
+        return sym
+
+
+class TestSymbolRecords(unittest.TestCase):
+    def record(self):
+        recorder = SymbolRecorder()
+        first = recorder.get_or_create_symbol(Member, display_name='A')
+        first.enum_value = 0
+        second = recorder.get_or_create_symbol(Member, display_name='B')
+        second.enum_value = 1
+        sym = recorder.get_or_create_symbol(
+            Enum, unique_name='E', members=[first, second], first=first,
+            filename='e.h')
+        recorder.end_unit('e.h:1', sym)
+        # Nothing created, no unit
+        recorder.end_unit('e.h:5', None)
+        recorder.get_or_create_symbol(Member, display_name='C')
+        recorder.end_unit('e.h:7', None)
+        return recorder, sym
+
+    def test_record(self):
+        recorder, sym = self.record()
+        self.assertEqual(sym.unique_name, 'E')
+        self.assertEqual(sym.kwargs['members'][0].unique_name, 'A')
+        self.assertEqual(sym.kwargs['members'][1].attributes, {'enum_value': 1})
+        units = recorder.pop_units()
+        self.assertEqual([u.key for u in units], ['e.h:1', 'e.h:7'])
+        self.assertEqual([len(u.records) for u in units], [3, 1])
+        self.assertEqual([u.registered for u in units], [True, False])
+        self.assertEqual(recorder.pop_units(), [])
+
+    def test_replay(self):
+        recorder, _ = self.record()
+        units = pickle.loads(pickle.dumps(recorder.pop_units()))
+        doc_db = _DocDatabase()
+        sym = replay_unit(units[0], doc_db)
+        self.assertIsInstance(sym, Enum)
+        self.assertEqual(sym.kwargs['unique_name'], 'E')
+        self.assertEqual(sym.kwargs['filename'], 'e.h')
+        members = sym.kwargs['members']
+        self.assertEqual(members, doc_db.symbols[:2])
+        self.assertIs(sym.kwargs['first'], members[0])
+        self.assertEqual([m.kwargs['display_name'] for m in members],
+                         ['A', 'B'])
+        self.assertEqual([m.enum_value for m in members], [0, 1])
+
+        self.assertIsNone(replay_unit(units[1], doc_db))
+        self.assertEqual(doc_db.symbols[-1].kwargs, {'display_name': 'C'})
+
+
+if __name__ == '__main__':
+    unittest.main()
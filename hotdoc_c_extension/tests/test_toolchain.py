@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from hotdoc_c_extension import toolchain
+
+
+class TestToolchainCache(unittest.TestCase):
+    def setUp(self):
+        self.__dir = tempfile.mkdtemp()
+        self.llvm_config = self.touch('llvm-config')
+        self.pc_file = self.touch('glib-2.0.pc')
+        patches = [
+            mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.__dir}),
+            mock.patch.object(toolchain, '_CACHE', None),
+            mock.patch.object(toolchain, '_UNSTAMPED_CFLAGS', {}),
+            mock.patch.object(toolchain, 'which',
+                              return_value=self.llvm_config)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.__dir)
+
+    def touch(self, name, mtime=1):
+        path = os.path.join(self.__dir, name)
+        with open(path, 'a'):
+            pass
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def forget_process_cache(self):
+        toolchain._CACHE = None
+
+    def test_llvm_info(self):
+        outputs = {'--version': '18.1.0', '--prefix': '/usr',
+                   '--libdir': '/usr/lib'}
+        with mock.patch.object(toolchain, '_llvm_config',
+                               side_effect=outputs.get) as llvm_config:
+            info = toolchain.get_llvm_info()
+            self.assertEqual(info['version'], '18.1.0')
+            self.assertEqual(llvm_config.call_count, 3)
+
+            self.forget_process_cache()
+            self.assertEqual(toolchain.get_llvm_info()['libdir'], '/usr/lib')
+            self.assertEqual(llvm_config.call_count, 3)
+
+            # Another llvm-config install
+            self.touch('llvm-config', mtime=2)
+            toolchain.get_llvm_info()
+            self.assertEqual(llvm_config.call_count, 6)
+
+    def test_pkg_config_cflags(self):
+        with mock.patch.object(toolchain.pkgconfig, 'cflags',
+                               return_value='-I/usr/include/glib-2.0') \
+                as cflags, \
+                mock.patch.object(toolchain, '_get_pc_files',
+                                  return_value=[self.pc_file]):
+            self.assertEqual(toolchain.get_pkg_config_cflags('glib-2.0'),
+                             '-I/usr/include/glib-2.0')
+            self.forget_process_cache()
+            toolchain.get_pkg_config_cflags('glib-2.0')
+            self.assertEqual(cflags.call_count, 1)
+
+            self.touch('glib-2.0.pc', mtime=2)
+            toolchain.get_pkg_config_cflags('glib-2.0')
+            self.assertEqual(cflags.call_count, 2)
+
+            with mock.patch.dict(os.environ,
+                                 {'PKG_CONFIG_PATH': self.__dir}):
+                toolchain.get_pkg_config_cflags('glib-2.0')
+            self.assertEqual(cflags.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
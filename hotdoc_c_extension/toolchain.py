@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cached toolchain probes.
+
+Asking llvm-config and pkg-config means spawning processes, which adds
+up as scanners get created for every code inclusion. Results are kept
+for the lifetime of the process, and on disk across runs, the disk
+entries being discarded when the llvm-config binary or one of the .pc
+files involved changes.
+"""
+
+import os
+import json
+import subprocess
+
+import pkgconfig
+
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
+
+_PKG_CONFIG_ENV = ('PKG_CONFIG_PATH', 'PKG_CONFIG_LIBDIR',
+                   'PKG_CONFIG_SYSROOT_DIR')
+
+_CACHE = None
+
+# cflags of packages whose .pc files could not be located, only kept for
+# the lifetime of the process
+_UNSTAMPED_CFLAGS = {}
+
+
+def _get_cache_path():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'hotdoc_c_extension', 'toolchain.json')
+
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except (OSError, TypeError):
+        return None
+
+
+def _load_cache():
+    global _CACHE
+    if _CACHE is None:
+        try:
+            with open(_get_cache_path(), 'r') as _:
+                _CACHE = json.load(_)
+        except (IOError, ValueError):
+            _CACHE = {}
+        _CACHE.setdefault('llvm', None)
+        _CACHE.setdefault('pkg-config', {})
+    return _CACHE
+
+
+def _save_cache():
+    path = _get_cache_path()
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(tmp_path, 'w') as _:
+            json.dump(_CACHE, _)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass
+
+
+def _llvm_config(arg):
+    return subprocess.check_output(['llvm-config', arg]).strip().decode()
+
+
+def get_llvm_info():
+    """
+    Returns a dict with the 'version', 'prefix' and 'libdir' llvm-config
+    reports, and the clang 'resource_include_dir', None if not found.
+    """
+    cache = _load_cache()
+    llvm_config = which('llvm-config')
+    stamp = [llvm_config, _get_mtime(llvm_config)]
+
+    info = cache['llvm']
+    if info is not None and info['stamp'] == stamp:
+        return info
+
+    version = _llvm_config('--version')
+    prefix = _llvm_config('--prefix')
+    libdir = _llvm_config('--libdir')
+
+    resource_include_dir = None
+    for lib in ['lib', 'lib64']:
+        path = os.path.join(prefix, lib, 'clang', version, 'include')
+        if os.path.exists(path):
+            resource_include_dir = path
+            break
+
+    info = {'stamp': stamp, 'version': version, 'prefix': prefix,
+            'libdir': libdir, 'resource_include_dir': resource_include_dir}
+    cache['llvm'] = info
+    _save_cache()
+    return info
+
+
+def _pkg_config(*args):
+    return subprocess.check_output(['pkg-config'] + list(args)).decode()
+
+
+def _get_pc_files(package):
+    """
+    Returns the .pc files the cflags of `package` come from, or None if
+    pkg-config can not tell.
+    """
+    result = []
+    seen = set()
+    packages = [package]
+    try:
+        while packages:
+            current = packages.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            result.append(_pkg_config('--path', current).strip())
+            for option in ('--print-requires', '--print-requires-private'):
+                for line in _pkg_config(option, current).splitlines():
+                    if line.strip():
+                        packages.append(line.split()[0])
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return result
+
+
+def get_pkg_config_cflags(package):
+    cache = _load_cache()
+    key = '\0'.join([package] + [os.environ.get(var, '')
+                                 for var in _PKG_CONFIG_ENV])
+
+    if key in _UNSTAMPED_CFLAGS:
+        return _UNSTAMPED_CFLAGS[key]
+
+    entry = cache['pkg-config'].get(key)
+    if entry is not None and all(
+            _get_mtime(path) == mtime
+            for path, mtime in entry['pc_files'].items()):
+        return entry['cflags']
+
+    cflags = pkgconfig.cflags(package)
+    pc_files = _get_pc_files(package)
+    if pc_files is None:
+        _UNSTAMPED_CFLAGS[key] = cflags
+    else:
+        cache['pkg-config'][key] = {
+            'cflags': cflags,
+            'pc_files': {path: _get_mtime(path) for path in pc_files}}
+        _save_cache()
+
+    return cflags
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Decoding of source files whose encoding isn't known.
+"""
+
+import os
+import re
+
+import cchardet
+
+NON_ASCII_RE = re.compile(b'[\x80-\xff]')
+
+# path -> ((mtime, size), encoding) of the files decoded so far
+_ENCODINGS = {}
+
+
+def detect_encoding(data):
+    """
+    Returns the encoding `data` is most likely in, checking whether it
+    is valid UTF-8 before resorting to cchardet.
+    """
+    try:
+        data.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    # ASCII lines don't tell encodings apart, and cchardet takes much
+    # longer on a whole file than on the few lines that matter
+    sample = b'\n'.join(line for line in data.split(b'\n')
+                         if NON_ASCII_RE.search(line))
+    return cchardet.detect(sample)['encoding'] or 'utf-8'
+
+
+def read_source_bytes(path):
+    """
+    Returns the contents of `path` and their encoding, the encoding
+    detected for it is remembered until the file changes.
+    """
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    with open(path, 'rb') as _:
+        data = _.read()
+
+    cached = _ENCODINGS.get(path)
+    if cached is not None and cached[0] == key:
+        encoding = cached[1]
+    else:
+        encoding = detect_encoding(data)
+        _ENCODINGS[path] = (key, encoding)
+
+    return data, encoding
+
+
+def read_scannable_source(path):
+    """
+    Returns the contents of `path` and their encoding, transcoded to
+    UTF-8 unless they already are in an encoding the comment scanner,
+    which looks for ASCII delimiters in bytes, can work with.
+    """
+    data, encoding = read_source_bytes(path)
+    if encoding not in ('utf-8', 'ascii'):
+        data = data.decode(encoding, errors='replace').encode('utf-8')
+        encoding = 'utf-8'
+    return data, encoding
+
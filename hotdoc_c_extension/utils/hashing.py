@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2026 agent <agent@local>
+#
+# This library is free software; you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation; either version 2.1 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Content hashing helpers shared by the on-disk caches.
+"""
+
+import os
+import hashlib
+
+# (path) -> ((mtime, size), digest), so that a file is only read again
+# when its stat information changes
+_FILE_HASHES = {}
+
+
+def hash_strings(*strings):
+    """
+    Returns a hex digest identifying a sequence of strings.
+    """
+    sha = hashlib.sha1()
+    for string in strings:
+        sha.update(string.encode('utf-8', 'surrogateescape'))
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+def hash_file(path):
+    """
+    Returns the hex digest of the contents of `path`, or None if it
+    can not be read.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _FILE_HASHES.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    sha = hashlib.sha1()
+    try:
+        with open(path, 'rb') as _:
+            for chunk in iter(lambda: _.read(1 << 16), b''):
+                sha.update(chunk)
+    except IOError:
+        return None
+
+    digest = sha.hexdigest()
+    _FILE_HASHES[path] = (key, digest)
+    return digest
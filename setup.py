@@ -79,6 +79,36 @@ c_comment_scanner_module = FlexExtension(
                             ['hotdoc_c_extension/c_comment_scanner/scanner.l',
                             'hotdoc_c_extension/c_comment_scanner/scanner.h'])
 
+def get_clang_walker_module():
+    # Optional, the python side falls back to walking tokens through the
+    # bindings when it isn't built
+    try:
+        includedir = subprocess.check_output(
+            ['llvm-config', '--includedir']).strip().decode()
+        libdir = subprocess.check_output(
+            ['llvm-config', '--libdir']).strip().decode()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    if not os.path.exists(os.path.join(includedir, 'clang-c', 'Index.h')):
+        return None
+
+    return Extension('hotdoc_c_extension.clang_walker.clang_walker',
+                     sources=
+                     ['hotdoc_c_extension/clang_walker/walkermodule.c'],
+                     include_dirs=[includedir],
+                     library_dirs=[libdir],
+                     runtime_library_dirs=[libdir],
+                     libraries=['clang'],
+                     # A build failure, for a missing libclang.so link
+                     # for example, doesn't fail the install
+                     optional=True)
+
+ext_modules = [c_comment_scanner_module]
+clang_walker_module = get_clang_walker_module()
+if clang_walker_module is not None:
+    ext_modules.append(clang_walker_module)
+
 with open(os.path.join('hotdoc_c_extension', 'VERSION.txt'), 'r') as _:
     VERSION = _.read().strip()
 
@@ -96,12 +126,13 @@ setup(
         '': ['*.html'],
         'hotdoc_c_extension': ['VERSION.txt'],
         'hotdoc_c_extension.transition_scripts': ['translate_sections.sh'],
+        'hotdoc_c_extension.tests': ['fixtures/*'],
     },
     entry_points = {'hotdoc.extensions': 'get_extension_classes = hotdoc_c_extension.extensions:get_extension_classes'},
     scripts=['hotdoc_c_extension/transition_scripts/hotdoc_gtk_doc_porter',
              'hotdoc_c_extension/transition_scripts/hotdoc_gtk_doc_scan_parser'],
     cmdclass = {'build_ext': build_ext},
-    ext_modules = [c_comment_scanner_module],
+    ext_modules = ext_modules,
     install_requires = [
         'pkgconfig==1.1.0',
         'cchardet',